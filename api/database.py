@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException
+import asyncio
 from api.utils.database import get_db_connection, execute_query
 
 router = APIRouter()
@@ -7,8 +8,8 @@ router = APIRouter()
 async def test_connection():
     """Test the database connection."""
     try:
-        # Try to connect and get SQLite version
-        result = execute_query("SELECT sqlite_version() as version")
+        # Try to connect and get SQLite version off the event loop
+        result = await asyncio.to_thread(execute_query, "SELECT sqlite_version() as version")
         return {
             "status": "success",
             "message": "Database connection successful",
@@ -21,7 +22,7 @@ async def test_connection():
 async def get_tables():
     """Get list of all tables in the database."""
     try:
-        tables = execute_query("SELECT name FROM sqlite_master WHERE type='table'")
+        tables = await asyncio.to_thread(execute_query, "SELECT name FROM sqlite_master WHERE type='table'")
         return {
             "tables": [table["name"] for table in tables]
         }
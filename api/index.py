@@ -1,51 +1,73 @@
 from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import text
 from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
 from typing import List, Optional
 from datetime import date, datetime, timedelta
+import asyncio
 import json
+import os
+import orjson
 
-from api.models.database import get_db, create_tables
+from api.models.database import engine, get_db, create_tables
 from api.models.schemas import (
     PaymentCreate, PaymentResponse, ImportResponse, DateRangeParams,
-    ReportResponse, ExchangeRateResponse
+    ExchangeRateResponse
 )
 from api.utils.data_import import process_import_file
 from api.utils.data_storage import (
-    save_payment, save_bulk_payments, get_payments, get_payment_by_id,
+    save_bulk_payments, get_payments, iter_payment_rows, get_payment_by_id,
     update_payment, delete_payment
 )
-from api.utils.report_generator import (
-    generate_daily_report, generate_weekly_report, generate_monthly_channel_report,
-    generate_yearly_summary, generate_property_report, generate_customer_report
-)
-from api.utils.currency_conversion import get_exchange_rate_with_fallback
+from api.utils.currency_conversion import aprefetch_exchange_rates, get_cached_exchange_rate
+from api.utils.payment_writer import payment_writer
 from api.settings import router as settings_router
 from api.database import router as database_router
+from api.reports import router as reports_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create database tables, warm up a pooled connection and start the payment writer."""
+    create_tables()
+    # Open the pooled connection now so PRAGMA setup and WAL file creation
+    # are not paid by the first request
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    payment_writer.start()
+    yield
+    await payment_writer.stop()
+    engine.dispose()
+
 
 app = FastAPI(
     title="Tahsilat Raporu API",
     description="API for the Tahsilat Raporu payment reporting application",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+# Allowed frontend origins, comma separated. An explicit list keeps the CORS
+# middleware on its simple-origin path instead of echoing wildcard headers.
+CORS_ORIGINS = os.environ.get("CORS_ORIGINS", "http://localhost:3000").split(",")
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, restrict this to your frontend domain
+    allow_origins=[origin.strip() for origin in CORS_ORIGINS if origin.strip()],
     allow_credentials=True,
-    allow_methods=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
+    max_age=600,
 )
 
-# Include the settings and database routers
+# Include the settings, database and report routers
 app.include_router(settings_router, prefix="/api/settings", tags=["settings"])
 app.include_router(database_router, prefix="/api/database", tags=["database"])
-
-# Create database tables on startup
-@app.on_event("startup")
-async def startup_event():
-    create_tables()
+app.include_router(reports_router, prefix="/api", tags=["reports"])
 
 
 # Health check endpoint
@@ -74,8 +96,13 @@ async def import_payments(
                 errors=errors
             )
         
+        # Download missing exchange rates concurrently before the bulk insert
+        await aprefetch_exchange_rates(
+            date.fromisoformat(record["payment_date"]) for record in payment_data
+        )
+        
         # Save the validated data to the database
-        saved_count, save_errors = await save_bulk_payments(db, payment_data)
+        saved_count, save_errors = await asyncio.to_thread(save_bulk_payments, db, payment_data)
         
         # Combine any errors from saving with validation errors
         all_errors = errors + save_errors
@@ -93,19 +120,31 @@ async def import_payments(
 
 # Payment CRUD endpoints
 @app.post("/api/payments", response_model=PaymentResponse)
-async def create_payment(
-    payment: PaymentCreate,
-    db: Session = Depends(get_db)
-):
+async def create_payment(payment: PaymentCreate):
     """Create a new payment record."""
     try:
         payment_data = payment.dict()
-        db_payment = await save_payment(db, payment_data)
+        # Concurrent creations are group-committed by the background writer
+        db_payment = await payment_writer.submit(payment_data)
         return db_payment
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create payment: {str(e)}")
 
 
+# Listings larger than this are streamed instead of built in memory
+STREAMING_LIST_THRESHOLD = 1000
+
+
+def _stream_json_array(payments):
+    """Encode payment row dictionaries as a JSON array one row at a time."""
+    yield b"["
+    for idx, payment in enumerate(payments):
+        if idx:
+            yield b","
+        yield orjson.dumps(payment)
+    yield b"]"
+
+
 @app.get("/api/payments", response_model=List[PaymentResponse])
 async def list_payments(
     skip: int = 0,
@@ -118,8 +157,16 @@ async def list_payments(
     db: Session = Depends(get_db)
 ):
     """List payment records with optional filtering."""
-    payments = await get_payments(
-        db, skip, limit, start_date, end_date, 
+    if limit > STREAMING_LIST_THRESHOLD:
+        # Core rows skip ORM instance construction for every streamed payment
+        payments = iter_payment_rows(
+            db, skip, limit, start_date, end_date,
+            customer_name, property_id, payment_channel
+        )
+        return StreamingResponse(_stream_json_array(payments), media_type="application/json")
+    
+    payments = await asyncio.to_thread(
+        get_payments, db, skip, limit, start_date, end_date, 
         customer_name, property_id, payment_channel
     )
     return payments
@@ -131,7 +178,7 @@ async def get_payment(
     db: Session = Depends(get_db)
 ):
     """Get a specific payment record by ID."""
-    payment = await get_payment_by_id(db, payment_id)
+    payment = await asyncio.to_thread(get_payment_by_id, db, payment_id)
     if payment is None:
         raise HTTPException(status_code=404, detail="Payment not found")
     return payment
@@ -145,7 +192,7 @@ async def update_payment_endpoint(
 ):
     """Update an existing payment record."""
     payment_data = payment.dict()
-    updated_payment = await update_payment(db, payment_id, payment_data)
+    updated_payment = await asyncio.to_thread(update_payment, db, payment_id, payment_data)
     if updated_payment is None:
         raise HTTPException(status_code=404, detail="Payment not found")
     return updated_payment
@@ -157,91 +204,22 @@ async def delete_payment_endpoint(
     db: Session = Depends(get_db)
 ):
     """Delete a payment record."""
-    success = await delete_payment(db, payment_id)
+    success = await asyncio.to_thread(delete_payment, db, payment_id)
     if not success:
         raise HTTPException(status_code=404, detail="Payment not found")
     return {"success": True, "message": "Payment deleted"}
 
 
-# Report endpoints
-@app.get("/api/reports/daily", response_model=ReportResponse)
-async def daily_report(
-    start_date: date = Query(...),
-    end_date: date = Query(...),
-    db: Session = Depends(get_db)
-):
-    """Generate a daily USD payment report for a date range."""
-    report = await generate_daily_report(db, start_date, end_date)
-    return report
-
-
-@app.get("/api/reports/weekly", response_model=ReportResponse)
-async def weekly_report(
-    start_date: date = Query(...),
-    end_date: date = Query(...),
-    db: Session = Depends(get_db)
-):
-    """Generate a weekly summary report for a date range."""
-    report = await generate_weekly_report(db, start_date, end_date)
-    return report
-
-
-@app.get("/api/reports/monthly-channel", response_model=ReportResponse)
-async def monthly_channel_report(
-    year: int = Query(...),
-    month: int = Query(...),
-    db: Session = Depends(get_db)
-):
-    """Generate a monthly payment channel report."""
-    report = await generate_monthly_channel_report(db, year, month)
-    return report
-
-
-@app.get("/api/reports/yearly", response_model=ReportResponse)
-async def yearly_report(
-    year: int = Query(...),
-    db: Session = Depends(get_db)
-):
-    """Generate a yearly summary report."""
-    report = await generate_yearly_summary(db, year)
-    return report
-
-
-@app.get("/api/reports/property", response_model=ReportResponse)
-async def property_report(
-    property_id: str = Query(...),
-    start_date: Optional[date] = None,
-    end_date: Optional[date] = None,
-    db: Session = Depends(get_db)
-):
-    """Generate a report for a specific property."""
-    report = await generate_property_report(db, property_id, start_date, end_date)
-    return report
-
-
-@app.get("/api/reports/customer", response_model=ReportResponse)
-async def customer_report(
-    customer_name: str = Query(...),
-    start_date: Optional[date] = None,
-    end_date: Optional[date] = None,
-    db: Session = Depends(get_db)
-):
-    """Generate a report for a specific customer."""
-    report = await generate_customer_report(db, customer_name, start_date, end_date)
-    return report
-
-
 # Exchange rate endpoint
 @app.get("/api/exchange-rate", response_model=ExchangeRateResponse)
 async def get_exchange_rate(
-    target_date: date = Query(default=None),
-    db: Session = Depends(get_db)
+    target_date: date = Query(default=None)
 ):
     """Get the USD to TL exchange rate for a specific date."""
     if target_date is None:
         target_date = date.today()
         
-    rate, actual_date = get_exchange_rate_with_fallback(target_date, db)
+    rate, actual_date = await asyncio.to_thread(get_cached_exchange_rate, target_date)
     
     return {
         "id": 0,  # Placeholder, not stored in DB
@@ -1,20 +1,86 @@
 import sqlite3
 from pathlib import Path
 
+# Database lives in the project root
+DATABASE_PATH = Path(__file__).parent.parent / "tahsilat_data.db"
+
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "cache_size=-64000",
+    "mmap_size=268435456",
+    "foreign_keys=ON",
+)
+
+# amount_paid as an integer number of kuruş, so summaries are exact integer SUMs
+# that a covering index can serve. Writers that only set amount_paid (the
+# Next.js API) have it filled in by these triggers; the bulk importer sets it
+# itself, so the insert trigger does not fire on that path.
+AMOUNT_KURUS_TRIGGERS = """
+    CREATE TRIGGER IF NOT EXISTS payments_amount_kurus_ai AFTER INSERT ON payments
+    WHEN NEW.amount_paid_kurus IS NULL AND NEW.amount_paid IS NOT NULL
+    BEGIN
+        UPDATE payments SET amount_paid_kurus = CAST(ROUND(NEW.amount_paid * 100) AS INTEGER) WHERE id = NEW.id;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS payments_amount_kurus_au AFTER UPDATE OF amount_paid ON payments
+    BEGIN
+        UPDATE payments SET amount_paid_kurus = CAST(ROUND(NEW.amount_paid * 100) AS INTEGER) WHERE id = NEW.id;
+    END;
+"""
+
+# Reported by the deploy checks when a database predates migrate_amount_kurus
+AMOUNT_KURUS_MISSING = "payments.amount_paid_kurus is missing, run scripts/optimize_database.py to add it"
+
+def has_amount_kurus(conn):
+    """Whether the payments table already has the amount_paid_kurus column."""
+    return any(row[1] == "amount_paid_kurus" for row in conn.execute("PRAGMA table_info(payments)"))
+
+def migrate_amount_kurus(conn):
+    """
+    Add and backfill payments.amount_paid_kurus and install its triggers.
+    
+    Safe to run repeatedly. Databases whose payments table has no amount_paid
+    column (the SQLAlchemy schema, which stores amounts as fixed point already)
+    are left alone.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(payments)")}
+    if "amount_paid" not in columns:
+        return
+    
+    if "amount_paid_kurus" not in columns:
+        # Column and backfill land together, so a failed run is simply retried
+        conn.executescript("""
+            BEGIN IMMEDIATE;
+            ALTER TABLE payments ADD COLUMN amount_paid_kurus INTEGER;
+            UPDATE payments SET amount_paid_kurus = CAST(ROUND(amount_paid * 100) AS INTEGER);
+            COMMIT;
+        """)
+    
+    conn.executescript(AMOUNT_KURUS_TRIGGERS)
+
 def init_database():
     """Initialize the SQLite database with schema."""
-    # Get the base directory (project root)
-    base_dir = Path(__file__).parent.parent
-    db_path = base_dir / "tahsilat_data.db"
+    db_path = DATABASE_PATH
     
     # Connect to SQLite database (creates it if it doesn't exist)
     conn = sqlite3.connect(str(db_path))
     cursor = conn.cursor()
     
-    # Create necessary tables
+    # Free pages are handed back with PRAGMA incremental_vacuum so the file and
+    # its backups stay small. Only takes effect on a new database, and has to
+    # be set before WAL mode writes the header.
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    
+    # Apply the same connection tuning as the SQLAlchemy engine
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma}")
+    
+    # Create necessary tables in a single transaction so the whole script
+    # costs one commit instead of one per statement
     cursor.executescript("""
-        -- Drop existing payments table if it exists (for update)
-        DROP TABLE IF EXISTS payments;
+        BEGIN IMMEDIATE;
         
         -- Customers table
         CREATE TABLE IF NOT EXISTS customers (
@@ -44,7 +110,7 @@ def init_database():
         );
         
         -- Updated Payments table with all Excel import fields
-        CREATE TABLE payments (
+        CREATE TABLE IF NOT EXISTS payments (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             customer_name TEXT NOT NULL,
             sales_person TEXT,
@@ -55,6 +121,7 @@ def init_database():
             amount_due DECIMAL(15, 2),
             currency_due TEXT DEFAULT 'TRY',
             amount_paid DECIMAL(15, 2),
+            amount_paid_kurus INTEGER,
             currency_paid TEXT DEFAULT 'TRY',
             exchange_rate DECIMAL(10, 4) DEFAULT 1.0,
             is_deposit INTEGER DEFAULT 0,
@@ -70,6 +137,9 @@ def init_database():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
         
+        -- Composite index for date-range report queries filtered by customer
+        CREATE INDEX IF NOT EXISTS ix_payments_date_cust ON payments(payment_date, customer_name);
+        
         -- Insert default payment channels
         INSERT OR IGNORE INTO payment_channels (id, name) 
         VALUES 
@@ -77,8 +147,12 @@ def init_database():
             (2, 'Cash'),
             (3, 'Credit Card'),
             (4, 'Check');
+        
+        COMMIT;
     """)
     
+    migrate_amount_kurus(conn)
+    
     # Commit and close connection
     conn.commit()
     conn.close()
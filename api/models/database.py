@@ -1,7 +1,12 @@
-from sqlalchemy import Column, Integer, Float, String, Date, DateTime, ForeignKey, create_engine
+from sqlalchemy import Column, Integer, Float, String, Date, DateTime, ForeignKey, Index, column, create_engine, event, table, text
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, scoped_session
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import OperationalError
 from datetime import datetime
+from decimal import Decimal
+import asyncio
 import os
 import pathlib
 
@@ -10,31 +15,104 @@ BASE_DIR = pathlib.Path(__file__).parent.parent.parent
 DATABASE_PATH = os.path.join(BASE_DIR, "tahsilat_data.db")
 DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
 
-# Create SQLAlchemy engine and session
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create SQLAlchemy engine and session. Database work runs in worker threads,
+# so each session needs its own connection. A QueuePool keeps connections
+# open and tuned between requests, sized for concurrent assistant tool calls.
+# WAL lets readers proceed while SQLite serializes writers. The busy timeout
+# covers waits for the write lock.
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False, "timeout": 30},
+    poolclass=QueuePool,
+    pool_size=20,
+    max_overflow=10,
+    pool_timeout=30,
+    pool_pre_ping=True,
+    insertmanyvalues_page_size=1000,
+)
+
+# Objects stay loaded after commit: write paths populate them via RETURNING,
+# so expiring would only force a redundant SELECT when serializing
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Session registry scoped to the asyncio task serving a request, so every
+# dependency resolved within one request shares a single session
+ScopedSession = scoped_session(SessionLocal, scopefunc=asyncio.current_task)
+
+# SQLite tuning applied to every new connection: WAL lets readers and the writer
+# proceed concurrently and synchronous=NORMAL drops the fsync on each commit
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "cache_size=-64000",
+    "mmap_size=268435456",
+    "foreign_keys=ON",
+)
+
+
+@event.listens_for(engine, "connect")
+def _sqlite_pragmas(dbapi_conn, _connection_record):
+    cursor = dbapi_conn.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
 
 # Create base model class
 Base = declarative_base()
 
 
+class FixedPoint(TypeDecorator):
+    """
+    Stores a decimal amount as a scaled INTEGER (e.g. 12.34 TL as 1234 kuruş)
+    so SUM() aggregates are exact and rows pack tighter than REAL/DECIMAL.
+    Values are exposed to Python as floats.
+    """
+    impl = Integer
+    cache_ok = True
+
+    def __init__(self, scale: int = 2):
+        super().__init__()
+        self.scale = scale
+        self.factor = 10 ** scale
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return int((Decimal(str(value)) * self.factor).to_integral_value())
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return value / self.factor
+
+
 class Payment(Base):
     """
     Payment model represents a payment record in the system.
     Contains details about the payment, customer, property, and converted currency values.
     """
     __tablename__ = "payments"
+    __table_args__ = (
+        # Report queries filter on a payment_date range plus one of these dimensions
+        Index("ix_payments_date_prop", "payment_date", "property_id"),
+        Index("ix_payments_date_cust", "payment_date", "customer_name"),
+        Index("ix_payments_date_channel", "payment_date", "payment_channel"),
+        # Property drill-downs pin property_id first, then scan the date range
+        Index("ix_payments_property_date", "property_id", "payment_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     payment_date = Column(Date, nullable=False)
     payment_time = Column(String, nullable=True)  # Optional time of payment
     customer_name = Column(String, nullable=False)
-    property_id = Column(String, nullable=False, index=True)
+    property_id = Column(String, nullable=False)
     property_name = Column(String, nullable=True)
     payment_channel = Column(String, nullable=False)  # e.g., Bank Transfer, Cash, Credit Card
-    amount_tl = Column(Float, nullable=False)
-    amount_usd = Column(Float, nullable=False)  # Converted amount based on exchange rate
-    exchange_rate = Column(Float, nullable=False)  # TL to USD exchange rate at payment date
+    amount_tl = Column(FixedPoint(2), nullable=False)  # Stored in kuruş
+    amount_usd = Column(FixedPoint(2), nullable=False)  # Converted amount based on exchange rate, stored in cents
+    exchange_rate = Column(FixedPoint(4), nullable=False)  # TL to USD exchange rate at payment date
     invoice_number = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -80,15 +158,245 @@ class ExchangeRate(Base):
         }
 
 
+class DailyPaymentTotal(Base):
+    """
+    Roll-up of payments per day, kept current by triggers on the payments table.
+    Serves the daily totals report without scanning individual payments.
+    """
+    __tablename__ = "mv_daily_totals"
+
+    date = Column(Date, primary_key=True)
+    total_tl = Column(FixedPoint(2), nullable=False)
+    total_usd = Column(FixedPoint(2), nullable=False)
+    payment_count = Column(Integer, nullable=False)
+
+
+class ChannelPaymentTotal(Base):
+    """
+    Roll-up of payments per day and payment channel, kept current by triggers.
+    Serves channel summaries over any date range.
+    """
+    __tablename__ = "mv_channel_totals"
+
+    date = Column(Date, primary_key=True)
+    payment_channel = Column(String, primary_key=True)
+    total_tl = Column(FixedPoint(2), nullable=False)
+    total_usd = Column(FixedPoint(2), nullable=False)
+    payment_count = Column(Integer, nullable=False)
+
+
+class MonthlyPaymentTotal(Base):
+    """
+    Roll-up of payments per calendar month, kept current by triggers.
+    Serves the monthly and yearly summaries.
+    """
+    __tablename__ = "mv_monthly_totals"
+
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    total_tl = Column(FixedPoint(2), nullable=False)
+    total_usd = Column(FixedPoint(2), nullable=False)
+    payment_count = Column(Integer, nullable=False)
+
+
 # Create the tables in the database
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    _sync_payment_indexes()
+    _migrate_fixed_point_amounts()
+    _install_payment_rollups()
+    _install_customer_search()
+
+
+def _has_model_payments(conn):
+    """
+    Whether the payments table carries every column of the Payment model.
+    Databases created by the legacy importer use a different payments layout,
+    which the index and roll-up setup must leave untouched.
+    """
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(payments)"))}
+    return columns.issuperset(column.name for column in Payment.__table__.columns)
+
+
+# Indexes superseded by a composite index sharing their leading column
+OBSOLETE_PAYMENT_INDEXES = ("ix_payments_property_id",)
+
+
+def _sync_payment_indexes():
+    """
+    Brings the payments indexes of an existing database in line with the model;
+    create_all() only builds indexes together with a newly created table.
+    """
+    with engine.begin() as conn:
+        if not _has_model_payments(conn):
+            return
+        for name in OBSOLETE_PAYMENT_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        for index in Payment.__table__.indexes:
+            index.create(bind=conn, checkfirst=True)
+
+
+# PRAGMA user_version once payments amounts have been scaled to integers
+FIXED_POINT_SCHEMA_VERSION = 1
+
+
+def _migrate_fixed_point_amounts():
+    """
+    One-time conversion of payments tables created when the amount columns
+    were FLOAT: scales stored values to the integer units FixedPoint expects.
+    """
+    with engine.begin() as conn:
+        columns = {row[1]: row[2].upper() for row in conn.execute(text("PRAGMA table_info(payments)"))}
+        if columns.get("amount_tl") not in ("FLOAT", "REAL"):
+            return
+        if conn.execute(text("PRAGMA user_version")).scalar() >= FIXED_POINT_SCHEMA_VERSION:
+            return
+        
+        conn.execute(text("""
+            UPDATE payments SET
+                amount_tl = CAST(ROUND(amount_tl * 100) AS INTEGER),
+                amount_usd = CAST(ROUND(amount_usd * 100) AS INTEGER),
+                exchange_rate = CAST(ROUND(exchange_rate * 10000) AS INTEGER)
+        """))
+        conn.execute(text(f"PRAGMA user_version = {FIXED_POINT_SCHEMA_VERSION}"))
+
+
+# Roll-up tables maintained from payments: (table, key columns, key expressions
+# over a payments row, where {row} is NEW, OLD or the payments table itself)
+PAYMENT_ROLLUPS = (
+    ("mv_daily_totals", ("date",), ("{row}.payment_date",)),
+    ("mv_channel_totals", ("date", "payment_channel"), ("{row}.payment_date", "{row}.payment_channel")),
+    ("mv_monthly_totals", ("year", "month"), (
+        "CAST(strftime('%Y', {row}.payment_date) AS INTEGER)",
+        "CAST(strftime('%m', {row}.payment_date) AS INTEGER)",
+    )),
+)
+
+
+def _rollup_add_sql(table, keys, exprs, row):
+    """UPSERT adding one payments row to its roll-up bucket."""
+    values = ", ".join(expr.format(row=row) for expr in exprs)
+    return f"""
+        INSERT INTO {table} ({", ".join(keys)}, total_tl, total_usd, payment_count)
+        VALUES ({values}, {row}.amount_tl, {row}.amount_usd, 1)
+        ON CONFLICT ({", ".join(keys)}) DO UPDATE SET
+            total_tl = total_tl + excluded.total_tl,
+            total_usd = total_usd + excluded.total_usd,
+            payment_count = payment_count + 1;"""
+
+
+def _rollup_remove_sql(table, keys, exprs, row):
+    """Subtracts one payments row from its bucket and drops the bucket once empty."""
+    match = " AND ".join(f"{key} = {expr.format(row=row)}" for key, expr in zip(keys, exprs))
+    return f"""
+        UPDATE {table} SET
+            total_tl = total_tl - {row}.amount_tl,
+            total_usd = total_usd - {row}.amount_usd,
+            payment_count = payment_count - 1
+        WHERE {match};
+        DELETE FROM {table} WHERE {match} AND payment_count <= 0;"""
+
+
+def _rollup_triggers():
+    """Builds the CREATE TRIGGER statements that keep every roll-up current."""
+    add_new = "".join(_rollup_add_sql(*rollup, "NEW") for rollup in PAYMENT_ROLLUPS)
+    remove_old = "".join(_rollup_remove_sql(*rollup, "OLD") for rollup in PAYMENT_ROLLUPS)
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS trg_payments_rollup_insert AFTER INSERT ON payments BEGIN{add_new}\nEND",
+        f"CREATE TRIGGER IF NOT EXISTS trg_payments_rollup_delete AFTER DELETE ON payments BEGIN{remove_old}\nEND",
+        "CREATE TRIGGER IF NOT EXISTS trg_payments_rollup_update "
+        "AFTER UPDATE OF payment_date, payment_channel, amount_tl, amount_usd ON payments "
+        f"BEGIN{remove_old}{add_new}\nEND",
+    )
+
+
+def rebuild_payment_rollups(conn):
+    """
+    Recomputes every roll-up table from the payments table.
+    
+    Args:
+        conn: Connection inside an open transaction
+    """
+    for table, keys, exprs in PAYMENT_ROLLUPS:
+        bucket = ", ".join(expr.format(row="payments") for expr in exprs)
+        conn.execute(text(f"DELETE FROM {table}"))
+        # WHERE true disambiguates INSERT ... SELECT from an UPSERT clause
+        conn.execute(text(f"""
+            INSERT INTO {table} ({", ".join(keys)}, total_tl, total_usd, payment_count)
+            SELECT {bucket}, SUM(amount_tl), SUM(amount_usd), COUNT(*)
+            FROM payments WHERE true
+            GROUP BY {bucket}
+        """))
+
+
+def _install_payment_rollups():
+    """
+    Creates the roll-up triggers. Triggers apply to every writer, including
+    raw sqlite3 scripts, so the roll-ups cannot drift from the payments table.
+    Roll-ups are rebuilt from scratch whenever a trigger had to be created.
+    """
+    triggers = _rollup_triggers()
+    with engine.begin() as conn:
+        if not _has_model_payments(conn):
+            return
+        existing = conn.execute(text(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_payments_rollup_%'"
+        )).scalar()
+        for trigger in triggers:
+            conn.execute(text(trigger))
+        if existing < len(triggers):
+            rebuild_payment_rollups(conn)
 
 
 # Get database session
-def get_db():
-    db = SessionLocal()
+async def get_db():
+    db = ScopedSession()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        ScopedSession.remove()
+
+# Trigram full-text index over payments.customer_name. Trigram tables answer
+# LIKE '%...%' from the index (ASCII case-insensitive, like ILIKE on SQLite)
+# once the pattern has at least CUSTOMER_FTS_MIN_LENGTH characters.
+payments_fts = table("payments_fts", column("rowid"), column("customer_name"))
+CUSTOMER_FTS_MIN_LENGTH = 3
+
+# Set once the index and its triggers are in place
+customer_search_fts = False
+
+CUSTOMER_FTS_STATEMENTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS payments_fts USING fts5("
+    "customer_name, content='payments', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS trg_payments_fts_insert AFTER INSERT ON payments BEGIN "
+    "INSERT INTO payments_fts (rowid, customer_name) VALUES (NEW.id, NEW.customer_name); END",
+    "CREATE TRIGGER IF NOT EXISTS trg_payments_fts_delete AFTER DELETE ON payments BEGIN "
+    "INSERT INTO payments_fts (payments_fts, rowid, customer_name) VALUES ('delete', OLD.id, OLD.customer_name); END",
+    "CREATE TRIGGER IF NOT EXISTS trg_payments_fts_update AFTER UPDATE OF customer_name ON payments BEGIN "
+    "INSERT INTO payments_fts (payments_fts, rowid, customer_name) VALUES ('delete', OLD.id, OLD.customer_name); "
+    "INSERT INTO payments_fts (rowid, customer_name) VALUES (NEW.id, NEW.customer_name); END",
+)
+
+
+def _install_customer_search():
+    """
+    Creates the customer name search index and the triggers keeping it in sync,
+    rebuilding it from payments when it is first created. Customer filters fall
+    back to a plain ILIKE scan when this SQLite build lacks FTS5.
+    """
+    global customer_search_fts
+    try:
+        with engine.begin() as conn:
+            if not _has_model_payments(conn):
+                return
+            existing = conn.execute(text(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name = 'payments_fts' OR name LIKE 'trg_payments_fts_%'"
+            )).scalar()
+            for statement in CUSTOMER_FTS_STATEMENTS:
+                conn.execute(text(statement))
+            if existing < len(CUSTOMER_FTS_STATEMENTS):
+                conn.execute(text("INSERT INTO payments_fts (payments_fts) VALUES ('rebuild')"))
+    except OperationalError:
+        # No fts5 module or trigram tokenizer in this SQLite build
+        return
+    customer_search_fts = True
@@ -1,47 +1,46 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import Dict, Any, Optional
-from datetime import date, datetime
+from datetime import date
+import asyncio
 
 from api.models.database import get_db
+from api.models.schemas import ReportResponse
 from api.utils.report_generator import (
     generate_daily_report, generate_weekly_report, generate_monthly_channel_report,
-    generate_yearly_summary, generate_property_report, generate_customer_report
+    generate_yearly_summary, generate_property_report, generate_customer_report,
+    REPORT_PAGE_SIZE
 )
 
 router = APIRouter()
 
-@router.get("/reports/daily")
+@router.get("/reports/daily", response_model=ReportResponse)
 async def get_daily_report(
-    start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
-    end_date: str = Query(..., description="End date in YYYY-MM-DD format"),
+    start_date: date = Query(..., description="Start date in YYYY-MM-DD format"),
+    end_date: date = Query(..., description="End date in YYYY-MM-DD format"),
     db: Session = Depends(get_db)
 ):
     """Get daily USD payment report for a date range."""
     try:
-        start = datetime.strptime(start_date, "%Y-%m-%d").date()
-        end = datetime.strptime(end_date, "%Y-%m-%d").date()
-        report = await generate_daily_report(db, start, end)
+        report = await asyncio.to_thread(generate_daily_report, db, start_date, end_date)
         return report
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating daily report: {str(e)}")
 
-@router.get("/reports/weekly")
+@router.get("/reports/weekly", response_model=ReportResponse)
 async def get_weekly_report(
-    start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
-    end_date: str = Query(..., description="End date in YYYY-MM-DD format"),
+    start_date: date = Query(..., description="Start date in YYYY-MM-DD format"),
+    end_date: date = Query(..., description="End date in YYYY-MM-DD format"),
     db: Session = Depends(get_db)
 ):
     """Get weekly summary report for a date range."""
     try:
-        start = datetime.strptime(start_date, "%Y-%m-%d").date()
-        end = datetime.strptime(end_date, "%Y-%m-%d").date()
-        report = await generate_weekly_report(db, start, end)
+        report = await asyncio.to_thread(generate_weekly_report, db, start_date, end_date)
         return report
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating weekly report: {str(e)}")
 
-@router.get("/reports/monthly")
+@router.get("/reports/monthly-channel", response_model=ReportResponse)
 async def get_monthly_report(
     year: int = Query(..., description="Year"),
     month: int = Query(..., description="Month (1-12)"),
@@ -49,51 +48,51 @@ async def get_monthly_report(
 ):
     """Get monthly payment channel report for a specific month."""
     try:
-        report = await generate_monthly_channel_report(db, year, month)
+        report = await asyncio.to_thread(generate_monthly_channel_report, db, year, month)
         return report
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating monthly report: {str(e)}")
 
-@router.get("/reports/yearly")
+@router.get("/reports/yearly", response_model=ReportResponse)
 async def get_yearly_report(
     year: int = Query(..., description="Year"),
     db: Session = Depends(get_db)
 ):
     """Get yearly summary report."""
     try:
-        report = await generate_yearly_summary(db, year)
+        report = await asyncio.to_thread(generate_yearly_summary, db, year)
         return report
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating yearly report: {str(e)}")
 
-@router.get("/reports/property")
+@router.get("/reports/property", response_model=ReportResponse)
 async def get_property_report(
     property_id: str = Query(..., description="Property ID"),
-    start_date: Optional[str] = Query(None, description="Start date in YYYY-MM-DD format"),
-    end_date: Optional[str] = Query(None, description="End date in YYYY-MM-DD format"),
+    start_date: Optional[date] = Query(None, description="Start date in YYYY-MM-DD format"),
+    end_date: Optional[date] = Query(None, description="End date in YYYY-MM-DD format"),
+    skip: int = Query(0, ge=0, description="Number of payment rows to skip"),
+    limit: int = Query(REPORT_PAGE_SIZE, ge=1, le=REPORT_PAGE_SIZE, description="Maximum number of payment rows to return"),
     db: Session = Depends(get_db)
 ):
     """Get report for a specific property."""
     try:
-        start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
-        end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
-        report = await generate_property_report(db, property_id, start, end)
+        report = await asyncio.to_thread(generate_property_report, db, property_id, start_date, end_date, skip, limit)
         return report
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating property report: {str(e)}")
 
-@router.get("/reports/customer")
+@router.get("/reports/customer", response_model=ReportResponse)
 async def get_customer_report(
     customer_name: str = Query(..., description="Customer name"),
-    start_date: Optional[str] = Query(None, description="Start date in YYYY-MM-DD format"),
-    end_date: Optional[str] = Query(None, description="End date in YYYY-MM-DD format"),
+    start_date: Optional[date] = Query(None, description="Start date in YYYY-MM-DD format"),
+    end_date: Optional[date] = Query(None, description="End date in YYYY-MM-DD format"),
+    skip: int = Query(0, ge=0, description="Number of payment rows to skip"),
+    limit: int = Query(REPORT_PAGE_SIZE, ge=1, le=REPORT_PAGE_SIZE, description="Maximum number of payment rows to return"),
     db: Session = Depends(get_db)
 ):
     """Get report for a specific customer."""
     try:
-        start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
-        end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
-        report = await generate_customer_report(db, customer_name, start, end)
+        report = await asyncio.to_thread(generate_customer_report, db, customer_name, start_date, end_date, skip, limit)
         return report
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating customer report: {str(e)}")
\ No newline at end of file
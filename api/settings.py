@@ -1,18 +1,22 @@
 from fastapi import APIRouter, HTTPException
+import asyncio
 import os
-import shutil
+import sqlite3
 from datetime import datetime
 from pathlib import Path
 
 router = APIRouter()
 
+# Resolve database and backup locations once at import time
+BASE_DIR = Path(__file__).parent.parent
+DATABASE_PATH = os.path.join(BASE_DIR, "tahsilat_data.db")
+BACKUPS_DIR = os.path.join(BASE_DIR, "backups")
+
 @router.get("/database-info")
 async def get_database_info():
     """Get information about the SQLite database."""
     try:
-        # Get the current working directory
-        base_dir = Path(__file__).parent.parent.parent
-        db_path = os.path.join(base_dir, "tahsilat_data.db")
+        db_path = DATABASE_PATH
         
         # Check if database exists
         exists = os.path.exists(db_path)
@@ -36,20 +40,30 @@ async def get_database_info():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting database info: {str(e)}")
 
+def _backup_sqlite(source_path: str, backup_path: str) -> None:
+    """Copy a live SQLite database with the online backup API."""
+    source = sqlite3.connect(source_path)
+    try:
+        destination = sqlite3.connect(backup_path)
+        try:
+            source.backup(destination)
+        finally:
+            destination.close()
+    finally:
+        source.close()
+
 @router.post("/backup-database")
 async def backup_database():
     """Create a backup of the SQLite database."""
     try:
-        # Get the current working directory
-        base_dir = Path(__file__).parent.parent.parent
-        db_path = os.path.join(base_dir, "tahsilat_data.db")
+        db_path = DATABASE_PATH
         
         # Check if database exists
         if not os.path.exists(db_path):
             raise HTTPException(status_code=404, detail="Database file not found")
         
         # Create backups directory if it doesn't exist
-        backups_dir = os.path.join(base_dir, "backups")
+        backups_dir = BACKUPS_DIR
         os.makedirs(backups_dir, exist_ok=True)
         
         # Generate backup filename with timestamp
@@ -57,8 +71,9 @@ async def backup_database():
         backup_filename = f"tahsilat_data_backup_{timestamp}.db"
         backup_path = os.path.join(backups_dir, backup_filename)
         
-        # Copy the database file
-        shutil.copy2(db_path, backup_path)
+        # Take a consistent online copy (safe under WAL while the app keeps
+        # writing) without blocking the event loop
+        await asyncio.to_thread(_backup_sqlite, db_path, backup_path)
         
         return {
             "success": True,
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from api.settings import router as settings_router
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 app.include_router(settings_router, prefix="/api/settings", tags=["settings"])
\ No newline at end of file
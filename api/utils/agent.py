@@ -1,24 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple, Union
 from datetime import date, datetime, timedelta
+from functools import lru_cache, partial
+import asyncio
 import json
 import os
+import re
+import orjson
 
 # Import LangChain components
+import langchain
+from langchain.cache import SQLiteCache
 from langchain.chat_models import ChatOpenAI
 from langchain.chains import LLMChain
-from langchain.agents import initialize_agent, Tool, AgentType
+from langchain.agents import initialize_agent, AgentExecutor, Tool, AgentType
 from langchain.memory import ConversationBufferMemory
-from langchain.prompts import PromptTemplate
+from langchain.prompts import PromptTemplate, MessagesPlaceholder
 from langchain.schema import SystemMessage, HumanMessage, AIMessage
 
-from api.models.database import get_db
+from api.models.database import SessionLocal
+from api.settings import BASE_DIR
 from api.utils.report_generator import (
     generate_daily_report, generate_weekly_report, generate_monthly_channel_report,
     generate_yearly_summary, generate_property_report, generate_customer_report
 )
-from api.utils.data_storage import get_payments, get_daily_totals, get_channel_summary
+from api.utils.data_storage import get_payment_rows, get_daily_totals, get_channel_summary
 
 # Get OpenAI API key from environment variable
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
@@ -35,6 +42,24 @@ llm = ChatOpenAI(
     openai_api_key=OPENAI_API_KEY
 )
 
+# Cheaper model that only phrases tool results for directly routed requests
+formatter_llm = ChatOpenAI(
+    model_name="gpt-3.5-turbo",
+    temperature=0.2,
+    openai_api_key=OPENAI_API_KEY
+)
+
+# Exact-match cache for LLM responses, shared by every worker on this host.
+# Tool outputs are part of the follow-up prompts, so changed data misses the cache.
+# A relative path is taken from the project root, not the working directory.
+LLM_CACHE_PATH = os.path.join(BASE_DIR, os.environ.get("LLM_CACHE_PATH", ".langchain.db"))
+
+# Conversation history replayed to the model: the last 6 user/assistant turns
+MAX_HISTORY_MESSAGES = 12
+
+# Upper bound on rows the search tool returns, whatever limit the model asks for
+SEARCH_PAYMENTS_MAX_LIMIT = 500
+
 # System prompt template for the assistant
 SYSTEM_TEMPLATE = """You are an AI assistant for the Tahsilat Payment Reporting System, which manages payment data for real estate companies.
 You help users analyze payment data, generate reports, and answer questions about the payments.
@@ -61,6 +86,50 @@ Always respond in a helpful, concise manner and focus on providing data-driven i
 """
 
 
+FORMATTER_TEMPLATE = """You are an AI assistant for the Tahsilat Payment Reporting System.
+Answer the user's question concisely using only the report data provided, focusing on data-driven insights."""
+
+# Common requests whose tool and arguments can be read straight off the message:
+# (pattern, tool name, builder turning the match into the tool input). Each
+# pattern has to match the whole message, so a request carrying anything
+# more (a customer, a property, a second condition) goes to the agent instead.
+_DATE = r'(\d{4}-\d{2}-\d{2})'
+_LEAD = r'(?:please\s+)?(?:(?:show|give|get|generate|create|run)\s+(?:me\s+)?)?(?:the\s+|a\s+)?'
+_RANGE = rf'(?:from|for|between)\s+{_DATE}\s+(?:to|and|until|-)\s+{_DATE}'
+_END = r'\s*[.?!]?'
+_INTENT_PATTERNS = [
+    (
+        re.compile(rf'{_LEAD}daily\s+(?:usd\s+)?(?:payment\s+)?(?:report|totals)\s+{_RANGE}{_END}', re.IGNORECASE),
+        "daily_report",
+        lambda m: {"start_date": m.group(1), "end_date": m.group(2)}
+    ),
+    (
+        re.compile(rf'{_LEAD}weekly\s+(?:summary\s+)?(?:report|totals)\s+{_RANGE}{_END}', re.IGNORECASE),
+        "weekly_report",
+        lambda m: {"start_date": m.group(1), "end_date": m.group(2)}
+    ),
+    (
+        re.compile(rf'{_LEAD}(?:monthly\s+)?(?:payment\s+)?channels?\s+(?:report|summary)\s+(?:for\s+)?(\d{{4}})-(\d{{1,2}}){_END}', re.IGNORECASE),
+        "monthly_channel_report",
+        lambda m: {"year": int(m.group(1)), "month": int(m.group(2))}
+    ),
+    (
+        re.compile(rf'{_LEAD}(?:yearly|annual)\s+(?:summary\s+)?(?:report\s+)?(?:for\s+)?(\d{{4}}){_END}', re.IGNORECASE),
+        "yearly_report",
+        lambda m: {"year": int(m.group(1))}
+    ),
+]
+
+
+def _match_intent(message: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Returns the tool name and input when a pattern matches the entire message."""
+    for pattern, tool_name, build_input in _INTENT_PATTERNS:
+        match = pattern.fullmatch(message.strip())
+        if match:
+            return tool_name, build_input(match)
+    return None
+
+
 # Define tool functions
 def daily_report_tool(start_date_str: str, end_date_str: str, db: Session) -> Dict[str, Any]:
     """Generate a daily USD payment report for a date range."""
@@ -137,72 +206,73 @@ def search_payments_tool(
     property_id: Optional[str] = None,
     payment_channel: Optional[str] = None,
     db: Session = None
-) -> Dict[str, Any]:
-    """Search for specific payment records."""
+) -> str:
+    """Search for specific payment records, returned as a JSON document."""
     try:
         start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
         end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
         
-        payments = get_payments(
-            db, skip, limit, start_date, end_date, 
+        payments = get_payment_rows(
+            db, skip, min(limit, SEARCH_PAYMENTS_MAX_LIMIT), start_date, end_date, 
             customer_name, property_id, payment_channel
         )
         
-        return {
+        return orjson.dumps({
             "count": len(payments),
-            "data": [payment.to_dict() for payment in payments]
-        }
+            "data": [dict(payment) for payment in payments]
+        }).decode()
     except Exception as e:
-        return {"error": f"Error searching payments: {str(e)}"}
+        return orjson.dumps({"error": f"Error searching payments: {str(e)}"}).decode()
 
 
-# Create agent with tools
-def create_agent(db: Session):
-    """Create a LangChain agent with the payment reporting tools."""
-    tools = [
-        Tool(
-            name="daily_report",
-            func=lambda args: daily_report_tool(args["start_date"], args["end_date"], db),
-            description="Generate a daily USD payment report for a date range. Input should be a JSON string with start_date and end_date in YYYY-MM-DD format."
+# Static tool definitions: (name, runner taking the parsed input and a session, description)
+@lru_cache(maxsize=1)
+def _build_tool_specs() -> Tuple[Tuple[str, Callable[[Dict[str, Any], Session], Union[Dict[str, Any], str]], str], ...]:
+    """Returns the tool specifications shared by every assistant request."""
+    return (
+        (
+            "daily_report",
+            lambda args, db: daily_report_tool(args["start_date"], args["end_date"], db),
+            "Generate a daily USD payment report for a date range. Input should be a JSON string with start_date and end_date in YYYY-MM-DD format."
         ),
-        Tool(
-            name="weekly_report",
-            func=lambda args: weekly_report_tool(args["start_date"], args["end_date"], db),
-            description="Generate a weekly summary report for a date range. Input should be a JSON string with start_date and end_date in YYYY-MM-DD format."
+        (
+            "weekly_report",
+            lambda args, db: weekly_report_tool(args["start_date"], args["end_date"], db),
+            "Generate a weekly summary report for a date range. Input should be a JSON string with start_date and end_date in YYYY-MM-DD format."
         ),
-        Tool(
-            name="monthly_channel_report",
-            func=lambda args: monthly_channel_report_tool(args["year"], args["month"], db),
-            description="Generate a monthly payment channel report. Input should be a JSON string with year as integer and month as integer (1-12)."
+        (
+            "monthly_channel_report",
+            lambda args, db: monthly_channel_report_tool(args["year"], args["month"], db),
+            "Generate a monthly payment channel report. Input should be a JSON string with year as integer and month as integer (1-12)."
         ),
-        Tool(
-            name="yearly_report",
-            func=lambda args: yearly_report_tool(args["year"], db),
-            description="Generate a yearly summary report. Input should be a JSON string with year as integer."
+        (
+            "yearly_report",
+            lambda args, db: yearly_report_tool(args["year"], db),
+            "Generate a yearly summary report. Input should be a JSON string with year as integer."
         ),
-        Tool(
-            name="property_report",
-            func=lambda args: property_report_tool(
+        (
+            "property_report",
+            lambda args, db: property_report_tool(
                 args["property_id"], 
                 args.get("start_date"), 
                 args.get("end_date"), 
                 db
             ),
-            description="Generate a report for a specific property. Input should be a JSON string with property_id and optional start_date and end_date in YYYY-MM-DD format."
+            "Generate a report for a specific property. Input should be a JSON string with property_id and optional start_date and end_date in YYYY-MM-DD format."
         ),
-        Tool(
-            name="customer_report",
-            func=lambda args: customer_report_tool(
+        (
+            "customer_report",
+            lambda args, db: customer_report_tool(
                 args["customer_name"], 
                 args.get("start_date"), 
                 args.get("end_date"), 
                 db
             ),
-            description="Generate a report for a specific customer. Input should be a JSON string with customer_name and optional start_date and end_date in YYYY-MM-DD format."
+            "Generate a report for a specific customer. Input should be a JSON string with customer_name and optional start_date and end_date in YYYY-MM-DD format."
         ),
-        Tool(
-            name="search_payments",
-            func=lambda args: search_payments_tool(
+        (
+            "search_payments",
+            lambda args, db: search_payments_tool(
                 args.get("skip", 0), 
                 args.get("limit", 20), 
                 args.get("start_date"), 
@@ -212,83 +282,151 @@ def create_agent(db: Session):
                 args.get("payment_channel"),
                 db
             ),
-            description="Search for specific payment records. Input should be a JSON string with optional parameters: skip, limit, start_date, end_date, customer_name, property_id, payment_channel."
+            "Search for specific payment records. Input should be a JSON string with optional parameters: skip, limit, start_date, end_date, customer_name, property_id, payment_channel."
         ),
-    ]
+    )
+
+
+def _run_tool(run: Callable[[Dict[str, Any], Session], Union[Dict[str, Any], str]], tool_input: Any) -> Union[Dict[str, Any], str]:
+    """
+    Decodes the JSON tool input the model sends and runs the tool.
     
-    # Create a memory buffer for the conversation
-    memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+    Each call checks a session out of the pool and returns it on exit, so
+    tools no longer hold on to the request's session.
+    """
+    args = json.loads(tool_input) if isinstance(tool_input, str) else tool_input
+    with SessionLocal() as db:
+        return run(args, db)
+
+
+@lru_cache(maxsize=1)
+def _install_llm_cache() -> None:
+    """Installs the shared LLM response cache on the first assistant request."""
+    langchain.llm_cache = SQLiteCache(database_path=LLM_CACHE_PATH)
+
+
+async def _run_tool_async(run: Callable[[Dict[str, Any], Session], Union[Dict[str, Any], str]], tool_input: Any) -> Union[Dict[str, Any], str]:
+    """Runs a tool's database work in a worker thread so the event loop stays free."""
+    return await asyncio.to_thread(_run_tool, run, tool_input)
+
+
+@lru_cache(maxsize=1)
+def _tool_runners() -> Dict[str, Callable[[Dict[str, Any], Session], Union[Dict[str, Any], str]]]:
+    """Maps tool names to their runners for directly routed requests."""
+    return {name: run for name, run, _ in _build_tool_specs()}
+
+
+async def _answer_from_tool(message: str, observation: Union[Dict[str, Any], str]) -> str:
+    """Phrases a tool result for the user with the cheaper formatting model."""
+    tool_output = observation if isinstance(observation, str) else orjson.dumps(observation).decode()
+    answer = await formatter_llm.ainvoke([
+        SystemMessage(content=FORMATTER_TEMPLATE),
+        HumanMessage(content=f"Question: {message}\n\nReport data: {tool_output}")
+    ])
+    return answer.content
+
+
+@lru_cache(maxsize=1)
+def _build_tools() -> List[Tool]:
+    """Builds the tools shared by every assistant request."""
+    return [
+        Tool(
+            name=name,
+            func=partial(_run_tool, run),
+            coroutine=partial(_run_tool_async, run),
+            description=description
+        )
+        for name, run, description in _build_tool_specs()
+    ]
+
+
+@lru_cache(maxsize=1)
+def _build_base_agent():
+    """
+    Builds the LangChain agent (prompt, output parser and LLM chain) once.
     
-    # Create the agent
-    agent = initialize_agent(
-        tools,
+    OpenAI function calling returns tool invocations as structured
+    AgentActions instead of text that has to be parsed.
+    """
+    executor = initialize_agent(
+        _build_tools(),
         llm,
-        agent=AgentType.CHAT_CONVERSATIONAL_REACT_DESCRIPTION,
+        agent=AgentType.OPENAI_FUNCTIONS,
+        agent_kwargs={
+            "system_message": SystemMessage(content=SYSTEM_TEMPLATE),
+            "extra_prompt_messages": [MessagesPlaceholder(variable_name="chat_history")],
+        },
         verbose=True,
-        memory=memory,
     )
+    return executor.agent
+
+
+# Create agent with tools
+def create_agent():
+    """Create a LangChain agent with the payment reporting tools."""
+    # A fresh memory buffer per request keeps conversations isolated
+    memory = ConversationBufferMemory(memory_key="chat_history", output_key="output", return_messages=True)
     
-    return agent
+    return AgentExecutor.from_agent_and_tools(
+        agent=_build_base_agent(),
+        tools=_build_tools(),
+        memory=memory,
+        return_intermediate_steps=True,
+        verbose=True,
+    )
 
 
 @router.post("/assistant")
 async def chat_with_assistant(
-    request_data: Dict[str, Any] = Body(...),
-    db: Session = Depends(get_db)
+    request_data: Dict[str, Any] = Body(...)
 ):
     """
     Chat with the AI assistant to analyze payment data and generate reports.
     """
     try:
+        _install_llm_cache()
+        
         message = request_data.get("message", "")
         history = request_data.get("history", [])
         
-        # Create the agent
-        agent = create_agent(db)
-        
-        # Set the system message
-        agent.memory.chat_memory.messages.append(SystemMessage(content=SYSTEM_TEMPLATE))
+        # Requests that name their report and dates go straight to the tool,
+        # skipping the GPT-4 planning round trip
+        intent = _match_intent(message)
+        if intent:
+            tool_used, tool_input = intent
+            observation = await _run_tool_async(_tool_runners()[tool_used], tool_input)
+            response = await _answer_from_tool(message, observation)
+        else:
+            # Create the agent
+            agent = create_agent()
+            
+            # Add the most recent turns only; the system prompt stays first and
+            # byte-identical in the cached agent, so OpenAI can reuse the prefix
+            for msg in history[-MAX_HISTORY_MESSAGES:]:
+                if msg["role"] == "user":
+                    agent.memory.chat_memory.messages.append(HumanMessage(content=msg["content"]))
+                elif msg["role"] == "assistant":
+                    agent.memory.chat_memory.messages.append(AIMessage(content=msg["content"]))
+            
+            # Process the user message without blocking the event loop. Stating
+            # today's date resolves relative ranges and keeps cached answers to
+            # questions like "yesterday" from outliving the day they were asked
+            result = await agent.ainvoke({"input": f"(Today is {date.today().isoformat()}) {message}"})
+            response = result["output"]
+            
+            # Tool calls come back as (AgentAction, tool output) pairs; report the last one
+            tool_used = None
+            observation = None
+            if result["intermediate_steps"]:
+                action, observation = result["intermediate_steps"][-1]
+                tool_used = action.tool
         
-        # Add message history
-        for msg in history:
-            if msg["role"] == "user":
-                agent.memory.chat_memory.messages.append(HumanMessage(content=msg["content"]))
-            elif msg["role"] == "assistant":
-                agent.memory.chat_memory.messages.append(AIMessage(content=msg["content"]))
-        
-        # Process the user message
-        response = agent.run(message)
-        
-        # Check if a tool was used and extract any data
-        tool_used = None
         tool_data = None
-        
-        # For simplicity, we'll assume the last AIMessage contains the tool usage information
-        for msg in reversed(agent.memory.chat_memory.messages):
-            if isinstance(msg, AIMessage) and msg.content != response:
-                if "I'll use the " in msg.content and " tool" in msg.content:
-                    # Extract tool name from message
-                    tool_start = msg.content.find("I'll use the ") + len("I'll use the ")
-                    tool_end = msg.content.find(" tool", tool_start)
-                    if tool_end > tool_start:
-                        tool_used = msg.content[tool_start:tool_end]
-                        
-                        # Try to extract any report data in the response
-                        if "report" in tool_used:
-                            try:
-                                # Look for JSON-like data in the response
-                                if "summary" in response and "total_usd" in response:
-                                    # This is a simple heuristic that will need enhancement
-                                    tool_data = {
-                                        "report_name": f"{tool_used.replace('_', ' ').title()}",
-                                        "summary": {
-                                            "total_usd": float(response.split("total_usd: ")[1].split("}")[0].strip()),
-                                            "total_count": int(response.split("total_count: ")[1].split("}")[0].strip())
-                                        }
-                                    }
-                            except:
-                                pass
-                break
+        if isinstance(observation, dict) and "summary" in observation:
+            tool_data = {
+                "report_name": observation.get("report_name"),
+                "summary": observation["summary"]
+            }
         
         return {
             "content": response,
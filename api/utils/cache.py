@@ -0,0 +1,108 @@
+import threading
+import time
+from datetime import date
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+# Report payloads are kept for a minute; payment writes through data_storage
+# evict the reports whose date range they fall into
+REPORT_CACHE_TTL = 60
+REPORT_CACHE_MAXSIZE = 512
+
+# Maps (function name, args, kwargs) to (expiry time, payload)
+_report_cache: Dict[Hashable, Tuple[float, Any]] = {}
+
+# Reports run in worker threads and writes invalidate from the payment writer
+# thread, so every access to _report_cache goes through this lock
+_report_cache_lock = threading.Lock()
+
+
+def cached_report(func: Optional[Callable] = None, *, ttl: float = REPORT_CACHE_TTL) -> Callable:
+    """
+    Caches the result of a report generator in process memory.
+    
+    The database session (first positional argument) is not part of the
+    cache key; entries are keyed on the remaining report parameters. Can be
+    applied bare or as cached_report(ttl=...).
+    
+    Args:
+        func: Report generator taking the session as its first argument
+        ttl: Seconds a cached payload stays valid
+    
+    Returns:
+        The wrapped report generator
+    """
+    if func is None:
+        return lambda f: cached_report(f, ttl=ttl)
+    
+    @wraps(func)
+    def wrapper(db, *args, **kwargs):
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        
+        with _report_cache_lock:
+            entry = _report_cache.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+        
+        # The report itself is built outside the lock
+        result = func(db, *args, **kwargs)
+        
+        with _report_cache_lock:
+            if len(_report_cache) >= REPORT_CACHE_MAXSIZE:
+                _evict_expired(now)
+            if len(_report_cache) >= REPORT_CACHE_MAXSIZE:
+                # Dicts keep insertion order, so the first key is the oldest entry
+                _report_cache.pop(next(iter(_report_cache)), None)
+            _report_cache[key] = (now + ttl, result)
+        
+        return result
+    
+    return wrapper
+
+
+def _evict_expired(now: float) -> None:
+    """Drops every cache entry whose TTL has passed. Callers hold _report_cache_lock."""
+    for key in [key for key, (expires, _) in _report_cache.items() if expires <= now]:
+        _report_cache.pop(key, None)
+
+
+def clear_report_cache() -> None:
+    """Invalidates all cached report payloads after payment data changes."""
+    with _report_cache_lock:
+        _report_cache.clear()
+
+
+def _report_range(payload: Any) -> Optional[Tuple[str, str]]:
+    """Returns the ISO (start, end) dates a report payload covers, if it declares them."""
+    try:
+        date_range = payload["date_range"]
+        return date_range["start_date"], date_range["end_date"]
+    except (KeyError, TypeError):
+        return None
+
+
+def invalidate_reports(payment_dates: Iterable[date]) -> None:
+    """
+    Drops the cached reports whose date range covers any of the given payment dates.
+    
+    Payloads that do not declare a date_range are always dropped.
+    
+    Args:
+        payment_dates: Dates of the payments that were written
+    """
+    days = {d.isoformat() for d in payment_dates}
+    if not days:
+        return
+    first, last = min(days), max(days)
+    
+    with _report_cache_lock:
+        for key, (_, payload) in list(_report_cache.items()):
+            covered = _report_range(payload)
+            if covered is None:
+                _report_cache.pop(key, None)
+                continue
+            start, end = covered
+            # ISO date strings compare in calendar order
+            if start <= last and end >= first and any(start <= day <= end for day in days):
+                _report_cache.pop(key, None)
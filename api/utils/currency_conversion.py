@@ -1,10 +1,22 @@
+import aiohttp
+import asyncio
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
+from io import BytesIO
 import os
-from typing import Dict, Optional, Union, Tuple
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Union, Tuple
 import xml.etree.ElementTree as ET
 import logging
 
+import numpy as np
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -13,52 +25,111 @@ logger = logging.getLogger(__name__)
 TCMB_TODAY_URL = "https://www.tcmb.gov.tr/kurlar/today.xml"
 TCMB_ARCHIVE_URL_TEMPLATE = "https://www.tcmb.gov.tr/kurlar/{year}{month}/{day}{month}{year}.xml"
 
-# Cache for exchange rates to reduce API calls
-exchange_rate_cache: Dict[str, float] = {}
+# How far a stored rate may be carried forward to cover weekends and holidays
+MAX_FORWARD_FILL_DAYS = 7
+
+# Concurrent TCMB downloads when several dates are missing at once
+TCMB_FETCH_WORKERS = 8
+
+# Previous business days tried when a date has no published rate
+FALLBACK_BUSINESS_DAYS = 5
+
+# Used when no rate can be found at all (adjust based on recent rates)
+DEFAULT_USD_TO_TL = 30.0
+
+# One pooled HTTPS session reuses TCP/TLS connections to TCMB
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504))
+))
 
 
 def get_exchange_rate_from_tcmb(target_date: date) -> Optional[float]:
     """
     Fetches the USD to TL exchange rate from TCMB (Turkish Central Bank) for a given date.
     
+    Rates are looked up in the exchange_rates table first and stored there
+    after a successful fetch, so every worker process shares them. Historical
+    rates are additionally memoized in process memory.
+    
     Args:
         target_date: The date for which to fetch the exchange rate
         
     Returns:
         The USD to TL exchange rate as a float, or None if not available
     """
-    # Format date for cache key
-    date_str = target_date.strftime("%Y-%m-%d")
+    try:
+        if target_date >= date.today():
+            # Today's rate may not be published yet, so never memoize it
+            return _load_exchange_rate(target_date)
+        return _cached_exchange_rate(target_date)
+    except LookupError:
+        return None
+
+
+def _load_exchange_rate(target_date: date) -> float:
+    """
+    Loads a rate from the database, falling back to TCMB and persisting the result.
     
-    # Check if the rate is already in cache
-    if date_str in exchange_rate_cache:
-        return exchange_rate_cache[date_str]
+    Raises:
+        LookupError: If no rate is available for the date, so that lru_cache
+            never memoizes a missing or transiently failed lookup
+    """
+    from api.models.database import SessionLocal, ExchangeRate
+    
+    db_session = SessionLocal()
+    try:
+        stored_rate = db_session.execute(
+            select(ExchangeRate.usd_to_tl).where(ExchangeRate.date == target_date)
+        ).scalar_one_or_none()
+        if stored_rate is not None:
+            return stored_rate
+        
+        rate = _fetch_tcmb_rate(target_date)
+        if rate is None:
+            raise LookupError(target_date)
+        
+        # Another worker may have stored the same date in the meantime
+        db_session.execute(
+            sqlite_insert(ExchangeRate)
+            .values(date=target_date, usd_to_tl=rate, created_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=["date"])
+        )
+        db_session.commit()
+        return rate
+    finally:
+        db_session.close()
+
+
+_cached_exchange_rate = lru_cache(maxsize=4096)(_load_exchange_rate)
+
+
+def _fetch_tcmb_rate(target_date: date) -> Optional[float]:
+    """
+    Downloads and parses the TCMB rate sheet for a date.
+    
+    Args:
+        target_date: The date for which to fetch the exchange rate
+        
+    Returns:
+        The USD to TL exchange rate as a float, or None if not available
+    """
+    date_str = target_date.strftime("%Y-%m-%d")
     
     # Determine which URL to use based on whether we're requesting today's rate or historical
     today = date.today()
     url = TCMB_TODAY_URL if target_date == today else _get_tcmb_archive_url(target_date)
     
     try:
-        response = requests.get(url, timeout=10)
+        response = _session.get(url, timeout=10)
         response.raise_for_status()
         
-        # Parse the XML response
-        root = ET.fromstring(response.content)
-        
-        # Find the USD rate
-        for currency in root.findall(".//Currency"):
-            if currency.get("Kod") == "USD":
-                # The buying rate is in the "ForexBuying" element
-                forex_buying = currency.find("ForexBuying")
-                if forex_buying is not None and forex_buying.text:
-                    rate = float(forex_buying.text.replace(',', '.'))
-                    
-                    # Cache the result
-                    exchange_rate_cache[date_str] = rate
-                    return rate
-        
-        logger.warning(f"USD rate not found in TCMB data for {date_str}")
-        return None
+        rate = _parse_usd_rate(response.content)
+        if rate is None:
+            logger.warning(f"USD rate not found in TCMB data for {date_str}")
+        return rate
         
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching exchange rate from TCMB for {date_str}: {str(e)}")
@@ -68,6 +139,31 @@ def get_exchange_rate_from_tcmb(target_date: date) -> Optional[float]:
         return None
 
 
+def _parse_usd_rate(content: bytes) -> Optional[float]:
+    """
+    Extracts the USD buying rate from a TCMB rate sheet.
+    
+    The sheet is scanned incrementally and parsing stops at the USD entry,
+    which is listed first, instead of building the whole tree.
+    
+    Args:
+        content: The raw XML document
+        
+    Returns:
+        The USD to TL exchange rate as a float, or None if not present
+    """
+    for _, currency in ET.iterparse(BytesIO(content), events=("end",)):
+        if currency.tag != "Currency":
+            continue
+        if currency.get("Kod") == "USD":
+            # The buying rate is in the "ForexBuying" element
+            forex_buying = currency.findtext("ForexBuying")
+            return float(forex_buying.replace(',', '.')) if forex_buying else None
+        currency.clear()
+    
+    return None
+
+
 def _get_tcmb_archive_url(target_date: date) -> str:
     """
     Generates the TCMB archive URL for a specific date.
@@ -109,61 +205,265 @@ def get_previous_business_day(from_date: date) -> date:
 def get_exchange_rate_with_fallback(target_date: date, db_session=None) -> Tuple[float, date]:
     """
     Gets the exchange rate for a target date with fallback to previous days if not available.
-    Also checks the database if a db_session is provided.
+    
+    Database lookup and storage happen in get_exchange_rate_from_tcmb, so
+    fallback days are served from the database as well.
     
     Args:
         target_date: The date for which to get the exchange rate
-        db_session: Optional SQLAlchemy session for database lookup
+        db_session: Unused; kept for compatibility with existing callers
         
     Returns:
         Tuple of (exchange rate, actual date used)
     """
-    # Try to get from the database first if session provided
-    if db_session:
-        from api.models.database import ExchangeRate
-        
-        db_rate = db_session.query(ExchangeRate).filter(
-            ExchangeRate.date == target_date
-        ).first()
-        
-        if db_rate:
-            return db_rate.usd_to_tl, target_date
+    try:
+        return _lookup_rate(target_date)
+    except LookupError:
+        return _default_rate(target_date)
+
+
+def _lookup_rate(target_date: date) -> Tuple[float, date]:
+    """
+    Looks up an exchange rate, walking back over non-business days.
     
+    Raises:
+        LookupError: If neither the date nor the previous business days have
+            a rate, so that the default is never memoized
+    """
     # Try to get the rate for the target date
     rate = get_exchange_rate_from_tcmb(target_date)
+    if rate is not None:
+        return rate, target_date
     
-    # If not available, try previous business days (up to 5 attempts)
+    # If not available, try the previous 5 business days concurrently
+    candidates = []
     current_date = target_date
-    attempts = 0
-    
-    while rate is None and attempts < 5:
+    for _ in range(FALLBACK_BUSINESS_DAYS):
         current_date = get_previous_business_day(current_date)
-        rate = get_exchange_rate_from_tcmb(current_date)
-        attempts += 1
-    
-    # If still not available, use a reasonable fallback value
-    if rate is None:
-        logger.warning(f"Could not find exchange rate for {target_date} or previous days, using default")
-        rate = 30.0  # Default fallback value (adjust based on recent rates)
-        current_date = target_date
-    
-    # If we have a database session, store this rate for future use
-    if db_session and target_date == current_date:  # Only store actual day rates, not fallbacks
-        from api.models.database import ExchangeRate
-        
-        db_session.add(ExchangeRate(
-            date=target_date,
-            usd_to_tl=rate
-        ))
-        db_session.commit()
+        candidates.append(current_date)
+    
+    with ThreadPoolExecutor(max_workers=FALLBACK_BUSINESS_DAYS) as pool:
+        candidate_rates = list(pool.map(get_exchange_rate_from_tcmb, candidates))
     
-    return rate, current_date
+    # Prefer the most recent day that has a published rate
+    for candidate_date, candidate_rate in zip(candidates, candidate_rates):
+        if candidate_rate is not None:
+            return candidate_rate, candidate_date
+    
+    raise LookupError(target_date)
+
+
+def _default_rate(target_date: date) -> Tuple[float, date]:
+    """Returns the fallback rate used when no published rate can be found."""
+    logger.warning(f"Could not find exchange rate for {target_date} or previous days, using default")
+    return DEFAULT_USD_TO_TL, target_date
+
+
+_cached_rate = lru_cache(maxsize=4096)(_lookup_rate)
+
+
+def get_cached_exchange_rate(target_date: date) -> Tuple[float, date]:
+    """
+    Gets the exchange rate for a date, memoized per process.
+    
+    Historical rates never change once published, so they are cached by date
+    alone. Today's rate is always looked up fresh since TCMB may not have
+    published it yet, and the default rate is never cached.
+    
+    Args:
+        target_date: The date for which to get the exchange rate
+        
+    Returns:
+        Tuple of (exchange rate, actual date used)
+    """
+    try:
+        if target_date >= date.today():
+            return _lookup_rate(target_date)
+        return _cached_rate(target_date)
+    except LookupError:
+        return _default_rate(target_date)
+
+
+def _stored_rates(start: date, end: date, db_session) -> Dict[date, float]:
+    """Loads the stored rates between two dates (inclusive) with one query."""
+    from api.models.database import ExchangeRate
+    
+    return dict(db_session.execute(
+        select(ExchangeRate.date, ExchangeRate.usd_to_tl).where(
+            ExchangeRate.date.between(start, end)
+        )
+    ).all())
+
+
+def _store_rates(rates: Dict[date, float], db_session) -> None:
+    """Stores fetched rates in one statement, skipping dates stored meanwhile; commits."""
+    from api.models.database import ExchangeRate
+    
+    if not rates:
+        return
+    
+    created_at = datetime.utcnow()
+    db_session.execute(
+        sqlite_insert(ExchangeRate).on_conflict_do_nothing(index_elements=["date"]),
+        [
+            {"date": target_date, "usd_to_tl": rate, "created_at": created_at}
+            for target_date, rate in rates.items()
+        ]
+    )
+    db_session.commit()
+
+
+def _fetch_and_store_rates(dates: List[date], db_session) -> Dict[date, float]:
+    """
+    Downloads rates for several dates concurrently and stores them in one statement.
+    
+    Args:
+        dates: Dates that have no stored rate yet
+        db_session: SQLAlchemy session used for the insert; it is committed
+        
+    Returns:
+        Dictionary of the dates TCMB published a rate for
+    """
+    if not dates:
+        return {}
+    
+    with ThreadPoolExecutor(max_workers=TCMB_FETCH_WORKERS) as pool:
+        fetched = {
+            target_date: rate
+            for target_date, rate in zip(dates, pool.map(_fetch_tcmb_rate, dates))
+            if rate is not None
+        }
+    
+    _store_rates(fetched, db_session)
+    return fetched
+
+
+async def _afetch_tcmb_rate(session: aiohttp.ClientSession, semaphore: asyncio.Semaphore, target_date: date) -> Optional[float]:
+    """Async counterpart of _fetch_tcmb_rate, bounded by a shared semaphore."""
+    date_str = target_date.strftime("%Y-%m-%d")
+    url = TCMB_TODAY_URL if target_date == date.today() else _get_tcmb_archive_url(target_date)
+    
+    async with semaphore:
+        try:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                content = await response.read()
+            return _parse_usd_rate(content)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error fetching exchange rate from TCMB for {date_str}: {str(e)}")
+            return None
+        except (ET.ParseError, ValueError) as e:
+            logger.error(f"Error parsing TCMB data for {date_str}: {str(e)}")
+            return None
+
+
+async def aprefetch_exchange_rates(dates: Iterable[date]) -> Dict[date, float]:
+    """
+    Makes sure rates for the given dates are stored, downloading missing ones concurrently.
+    
+    Runs on the event loop: downloads share one aiohttp connection pool and
+    at most TCMB_FETCH_WORKERS are in flight at once, while the database
+    work is offloaded to a worker thread.
+    
+    Args:
+        dates: The dates whose rates will be needed
+        
+    Returns:
+        Dictionary mapping each date with a published rate to that rate
+    """
+    from api.models.database import SessionLocal
+    
+    wanted = sorted(set(dates))
+    if not wanted:
+        return {}
+    
+    db_session = SessionLocal()
+    try:
+        stored = await asyncio.to_thread(_stored_rates, wanted[0], wanted[-1], db_session)
+        rates = {target_date: stored[target_date] for target_date in wanted if target_date in stored}
+        missing = [
+            target_date for target_date in wanted
+            if target_date not in rates and target_date.weekday() < 5
+        ]
+        if not missing:
+            return rates
+        
+        semaphore = asyncio.Semaphore(TCMB_FETCH_WORKERS)
+        async with aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=10),
+            connector=aiohttp.TCPConnector(limit=16)
+        ) as session:
+            results = await asyncio.gather(*[
+                _afetch_tcmb_rate(session, semaphore, target_date) for target_date in missing
+            ])
+        
+        fetched = {target_date: rate for target_date, rate in zip(missing, results) if rate is not None}
+        await asyncio.to_thread(_store_rates, fetched, db_session)
+        rates.update(fetched)
+        return rates
+    finally:
+        db_session.close()
+
+
+def get_exchange_rates_for_dates(dates: Iterable[date], db_session) -> Dict[date, float]:
+    """
+    Resolves exchange rates for a set of dates with a single database query.
+    
+    Stored rates are forward-filled onto dates without their own entry (up to
+    MAX_FORWARD_FILL_DAYS), so a batch only falls back to TCMB for dates that
+    have no recent stored rate at all.
+    
+    Args:
+        dates: The dates for which to resolve exchange rates
+        db_session: SQLAlchemy session for database lookup
+        
+    Returns:
+        Dictionary mapping each requested date to its USD to TL exchange rate
+    """
+    from api.models.database import ExchangeRate
+    
+    sorted_dates = sorted(set(dates))
+    if not sorted_dates:
+        return {}
+    
+    window_start = sorted_dates[0] - timedelta(days=MAX_FORWARD_FILL_DAYS)
+    stored_rates = db_session.query(ExchangeRate.date, ExchangeRate.usd_to_tl).filter(
+        ExchangeRate.date >= window_start,
+        ExchangeRate.date <= sorted_dates[-1]
+    ).order_by(ExchangeRate.date).all()
+    
+    rate_map = {}
+    unresolved = []
+    last_known = None
+    idx = 0
+    
+    for target_date in sorted_dates:
+        # Advance to the latest stored rate on or before the target date
+        while idx < len(stored_rates) and stored_rates[idx].date <= target_date:
+            last_known = stored_rates[idx]
+            idx += 1
+        
+        if last_known and (target_date - last_known.date).days <= MAX_FORWARD_FILL_DAYS:
+            rate_map[target_date] = last_known.usd_to_tl
+        else:
+            unresolved.append(target_date)
+    
+    # Fetch the remaining dates in parallel; only unpublished days walk back
+    rate_map.update(_fetch_and_store_rates(unresolved, db_session))
+    for target_date in unresolved:
+        if target_date not in rate_map:
+            rate_map[target_date], _ = get_exchange_rate_with_fallback(target_date, db_session)
+    
+    return rate_map
 
 
 def convert_tl_to_usd(amount_tl: float, rate_date: date, db_session=None) -> Tuple[float, float]:
     """
     Converts TL amount to USD based on the exchange rate for a specific date.
     
+    The rate comes from the per-process date cache, so converting many
+    payments on the same date costs a single lookup.
+    
     Args:
         amount_tl: The amount in Turkish Lira
         rate_date: The date to use for the exchange rate
@@ -172,9 +472,41 @@ def convert_tl_to_usd(amount_tl: float, rate_date: date, db_session=None) -> Tup
     Returns:
         Tuple of (USD amount, exchange rate used)
     """
-    rate, _ = get_exchange_rate_with_fallback(rate_date, db_session)
+    rate, _ = get_cached_exchange_rate(rate_date)
     
     # Convert TL to USD (TL ÷ rate = USD)
     amount_usd = amount_tl / rate
     
-    return amount_usd, rate
\ No newline at end of file
+    return amount_usd, rate
+
+
+def convert_tl_to_usd_bulk(amounts_tl: Sequence[float], rate_dates: Sequence[date], db_session) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converts many TL amounts to USD at once.
+    
+    Rates for the distinct dates are resolved with get_exchange_rates_for_dates
+    and laid out in a table indexed by day offset from the earliest date, so
+    the conversion itself is a single vectorized gather and divide.
+    
+    Args:
+        amounts_tl: The amounts in Turkish Lira
+        rate_dates: The exchange rate date for each amount
+        db_session: SQLAlchemy session for database lookup
+        
+    Returns:
+        Tuple of (USD amounts, exchange rates used), aligned with the inputs
+    """
+    if not rate_dates:
+        return np.empty(0), np.empty(0)
+    
+    rate_map = get_exchange_rates_for_dates(rate_dates, db_session)
+    min_date = min(rate_map)
+    
+    rate_table = np.full((max(rate_map) - min_date).days + 1, np.nan)
+    for rate_date, rate in rate_map.items():
+        rate_table[(rate_date - min_date).days] = rate
+    
+    date_idx = np.fromiter(((d - min_date).days for d in rate_dates), dtype=np.int64, count=len(rate_dates))
+    rates = rate_table[date_idx]
+    
+    return np.asarray(amounts_tl, dtype=np.float64) / rates, rates
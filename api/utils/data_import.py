@@ -1,9 +1,12 @@
 from fastapi import HTTPException, UploadFile
 import pandas as pd
-import json
-from io import BytesIO
+import asyncio
+import logging
+import orjson
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
 
 # Required fields for payment data import
 REQUIRED_FIELDS = [
@@ -21,145 +24,140 @@ FIELD_MAPPING = {
     'paid_currency': ['Ödenen Döviz', 'paid_currency'],
 }
 
+# Columns read from uploads; everything else is skipped while parsing
+IMPORT_COLUMNS = frozenset(alias for aliases in FIELD_MAPPING.values() for alias in aliases)
+
 
-def validate_and_normalize_data(data: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+# Excel stores dates as days since December 30, 1899
+EXCEL_EPOCH = pd.Timestamp(1899, 12, 30)
+MAX_EXCEL_SERIAL = 73415  # 2100-12-31
+
+# Accepted Tarih text formats, tried in order (Turkish formats first after ISO)
+DATE_FORMATS = [
+    '%Y-%m-%d',  # YYYY-MM-DD - ISO format
+    '%d/%m/%Y',  # DD/MM/YYYY - Turkish format
+    '%d.%m.%Y',  # DD.MM.YYYY - Turkish format
+    '%d-%m-%Y',  # DD-MM-YYYY - Turkish format
+    '%d/%m/%y',  # DD/MM/YY - Turkish format
+    '%d.%m.%y',  # DD.MM.YY - Turkish format
+    '%Y/%m/%d',  # YYYY/MM/DD - Alternative format
+    '%Y-%m-%d %H:%M:%S',  # Timestamps from partially parsed Excel columns
+]
+
+
+def _parse_dates(raw: pd.Series) -> pd.Series:
     """
-    Validates and normalizes imported payment data.
+    Parses a Tarih column into timestamps, leaving NaT where a value is invalid.
     
     Args:
-        data: List of payment records as dictionaries
+        raw: The raw Tarih column
         
     Returns:
-        Tuple of (normalized data, error messages)
+        Series of timestamps aligned with the input
     """
-    normalized_data = []
-    errors = []
-    
-    def _parse_date(date_value):
-        """Robust date parsing for Tarih column"""
-        # Handle empty values
-        if date_value is None or str(date_value).lower() in ['nan', 'none', '']:
-            return None
-            
-        # If it's already a datetime object (from pandas)
-        if hasattr(date_value, 'date'):
-            return date_value.date()
-            
-        # Handle numeric Excel dates (number of days since 1899/12/30)
-        try:
-            if isinstance(date_value, (int, float)) or (isinstance(date_value, str) and date_value.replace('.', '', 1).isdigit()):
-                num_value = float(date_value)
-                # Excel date system starts from December 30, 1899
-                base_date = datetime(1899, 12, 30)
-                delta_days = int(num_value)
-                date_obj = base_date + pd.Timedelta(days=delta_days)
-                print(f"DEBUG: Converted Excel numeric date {date_value} to {date_obj.date().isoformat()}")
-                return date_obj.date()
-        except Exception as e:
-            print(f"DEBUG: Failed to parse numeric date {date_value}: {e}")
-            pass
-        
-        # Handle string dates
-        date_str = str(date_value).strip()
-        if not date_str:
-            return None
-            
-        # Handle YYYY-MM-DD format directly
-        if '-' in date_str and len(date_str) == 10:
-            try:
-                year, month, day = map(int, date_str.split('-'))
-                if 1900 <= year <= 2100 and 1 <= month <= 12 and 1 <= day <= 31:
-                    return datetime(year, month, day).date()
-            except Exception:
-                pass
-            
-        # Turkish date formats first (most common)
-        formats = [
-            '%d/%m/%Y',  # DD/MM/YYYY - Turkish format
-            '%d.%m.%Y',  # DD.MM.YYYY - Turkish format
-            '%d-%m-%Y',  # DD-MM-YYYY - Turkish format
-            '%d/%m/%y',  # DD/MM/YY - Turkish format
-            '%d.%m.%y',  # DD.MM.YY - Turkish format
-            '%Y-%m-%d',  # YYYY-MM-DD - ISO format
-            '%Y/%m/%d',  # YYYY/MM/DD - Alternative format
-        ]
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt).date()
-            except Exception:
-                continue
-        
-        print(f"DEBUG: Failed to parse date using all formats: {date_value}")
-        return None
-
-    def parse_amount(val):
-        if val is None:
-            return 0.0
-        if isinstance(val, str):
-            val = val.replace('.', '').replace(',', '.')
-            try:
-                return float(val)
-            except Exception:
-                return 0.0
-        try:
-            return float(val)
-        except Exception:
-            return 0.0
-
-    for idx, record in enumerate(data):
-        row_num = idx + 1
-        normalized_record = {}
-        
-        # CRITICAL: Check for "Tarih" field directly first
-        if 'Tarih' in record:
-            raw_date = record['Tarih']
-        else:
-            # Fall back to the mapping as a last resort
-            found_date = False
-            for alias in FIELD_MAPPING['payment_date']:
-                if alias in record:
-                    raw_date = record[alias]
-                    found_date = True
-                    break
-            
-            if not found_date:
-                errors.append(f"Row {row_num}: Missing required 'Tarih' field")
-                continue
-        
-        # Map other fields normally
-        for field, aliases in FIELD_MAPPING.items():
-            if field != 'payment_date':  # Skip payment_date as we already handled it
-                for alias in aliases:
-                    if alias in record:
-                        normalized_record[field] = record[alias]
-                        break
-        
-        # Process the payment date
-        date_obj = _parse_date(raw_date)
-        if date_obj is None:
-            errors.append(f"Row {row_num}: Invalid Tarih format: {raw_date}")
-            continue
-            
-        normalized_record['payment_date'] = date_obj.isoformat()
-        
-        # Amount parsing
-        normalized_record['paid_amount'] = parse_amount(normalized_record.get('paid_amount', 0))
+    if pd.api.types.is_datetime64_any_dtype(raw):
+        return raw
+    
+    if pd.api.types.is_numeric_dtype(raw):
+        return _parse_excel_serials(raw)
+    
+    text = raw.astype(str).str.strip()
+    parsed = pd.Series(pd.NaT, index=raw.index, dtype='datetime64[ns]')
+    
+    for fmt in DATE_FORMATS:
+        pending = parsed.isna()
+        if not pending.any():
+            return parsed
+        parsed = parsed.fillna(pd.to_datetime(text.where(pending), format=fmt, errors='coerce'))
+    
+    # Excel serials that arrived as text (e.g. from CSV); only leftovers are converted
+    pending = parsed.isna()
+    if pending.any():
+        parsed = parsed.fillna(_parse_excel_serials(pd.to_numeric(text.where(pending), errors='coerce')))
+    
+    return parsed
+
+
+def _parse_excel_serials(serials: pd.Series) -> pd.Series:
+    """Converts Excel day numbers to timestamps; out-of-range values become NaT."""
+    serials = serials.where(serials.between(0, MAX_EXCEL_SERIAL))
+    return pd.to_datetime(serials, unit='D', origin=EXCEL_EPOCH)
+
+
+def _parse_amounts(raw: pd.Series) -> pd.Series:
+    """
+    Parses amounts, reading text as Turkish notation (1.234,56); invalid values become 0.
+    
+    Args:
+        raw: The raw amount column
         
-        # Currency normalization
-        val = normalized_record.get('paid_currency', '')
-        normalized_record['paid_currency'] = val.strip().upper() if isinstance(val, str) else 'USD'
+    Returns:
+        Series of floats aligned with the input
+    """
+    if pd.api.types.is_numeric_dtype(raw):
+        return raw.astype(float).fillna(0.0)
+    
+    # .str yields NaN for non-text cells, which are then read as plain numbers
+    text = raw.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    amounts = pd.to_numeric(text, errors='coerce')
+    amounts = amounts.fillna(pd.to_numeric(raw.where(text.isna()), errors='coerce'))
+    
+    return amounts.fillna(0.0).astype(float)
+
+
+def _normalize_currencies(raw: pd.Series) -> pd.Series:
+    """Upper-cases currency codes; non-text cells default to USD."""
+    if not pd.api.types.is_object_dtype(raw) and not pd.api.types.is_string_dtype(raw):
+        return pd.Series('USD', index=raw.index)
+    return raw.str.strip().str.upper().fillna('USD')
+
+
+def _first_alias_column(df: pd.DataFrame, aliases: List[str]) -> Optional[pd.Series]:
+    """Returns the first column whose name matches one of the aliases."""
+    for alias in aliases:
+        if alias in df.columns:
+            return df[alias]
+    return None
+
+
+def validate_and_normalize_data(data: Union[pd.DataFrame, List[Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Validates and normalizes imported payment data.
+    
+    Parsing runs column-wise over the whole frame rather than row by row.
+    
+    Args:
+        data: Payment records as a DataFrame (or a list of dictionaries)
         
-        # Defensive: If paid_amount is None or not a number, set to 0
-        if normalized_record['paid_amount'] is None or not isinstance(normalized_record['paid_amount'], (int, float)):
-            normalized_record['paid_amount'] = 0.0
-            
-        # Only keep payment_date, paid_amount, paid_currency
-        normalized_data.append({
-            'payment_date': normalized_record['payment_date'],
-            'paid_amount': normalized_record['paid_amount'],
-            'paid_currency': normalized_record['paid_currency']
-        })
+    Returns:
+        Tuple of (normalized data, error messages)
+    """
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    df = df.reset_index(drop=True)
+    
+    raw_dates = _first_alias_column(df, FIELD_MAPPING['payment_date'])
+    if raw_dates is None:
+        return [], [f"Row {row_num}: Missing required 'Tarih' field" for row_num in range(1, len(df) + 1)]
+    
+    dates = _parse_dates(raw_dates)
+    invalid = dates.isna()
+    errors = [
+        f"Row {idx + 1}: Invalid Tarih format: {raw_dates[idx]}"
+        for idx in df.index[invalid]
+    ]
+    
+    amounts = _first_alias_column(df, FIELD_MAPPING['paid_amount'])
+    currencies = _first_alias_column(df, FIELD_MAPPING['paid_currency'])
+    
+    normalized = pd.DataFrame({
+        'payment_date': dates.dt.strftime('%Y-%m-%d'),
+        'paid_amount': _parse_amounts(amounts) if amounts is not None else 0.0,
+        # A missing currency column leaves the currency blank
+        'paid_currency': _normalize_currencies(currencies) if currencies is not None else '',
+    })
+    
+    # Only keep payment_date, paid_amount, paid_currency
+    normalized_data = normalized[~invalid].to_dict(orient='records')
     
     return normalized_data, errors
 
@@ -175,41 +173,37 @@ async def process_import_file(file: UploadFile) -> Tuple[List[Dict[str, Any]], L
         Tuple of (extracted data, error messages)
     """
     file_extension = file.filename.split('.')[-1].lower()
-    content = await file.read()
+    # Parse straight from the spooled upload instead of copying it into memory first
+    upload = file.file
     
     try:
         if file_extension == 'csv':
-            df = pd.read_csv(BytesIO(content), dtype=str)
-            print('DEBUG: Detected columns:', list(df.columns))
+            df = await asyncio.to_thread(pd.read_csv, upload, dtype=str, usecols=IMPORT_COLUMNS.__contains__)
+            logger.debug("Detected columns: %s", list(df.columns))
             # Check if Tarih column exists
             if 'Tarih' not in df.columns:
                 raise HTTPException(status_code=400, detail="Error: 'Tarih' column not found. This column is required for payment dates.")
-            print('DEBUG: First 5 Tarih values:', df['Tarih'].head(5).tolist())
-            data = df.to_dict(orient='records')
         elif file_extension in ['xlsx', 'xls']:
-            # Set parse_dates=True to handle Excel dates properly
-            df = pd.read_excel(BytesIO(content), parse_dates=['Tarih'])
-            print('DEBUG: Detected columns:', list(df.columns))
+            # Set parse_dates=True to handle Excel dates properly; openpyxl reads in read-only mode
+            df = await asyncio.to_thread(
+                pd.read_excel, upload, parse_dates=['Tarih'], usecols=IMPORT_COLUMNS.__contains__
+            )
+            logger.debug("Detected columns: %s", list(df.columns))
             # Check if Tarih column exists
             if 'Tarih' not in df.columns:
                 raise HTTPException(status_code=400, detail="Error: 'Tarih' column not found. This column is required for payment dates.")
-            
-            # Convert dates to proper format
-            if pd.api.types.is_datetime64_any_dtype(df['Tarih']):
-                df['Tarih'] = df['Tarih'].dt.strftime('%Y-%m-%d')
-            
-            print('DEBUG: First 5 Tarih values (processed):', df['Tarih'].head(5).tolist())
-            data = df.to_dict(orient='records')
         elif file_extension == 'json':
-            data = json.loads(content)
+            data = await asyncio.to_thread(lambda: orjson.loads(upload.read()))
             # Check if Tarih key exists in the first record
             if data and 'Tarih' not in data[0]:
                 raise HTTPException(status_code=400, detail="Error: 'Tarih' field not found. This field is required for payment dates.")
+            df = pd.DataFrame(data)
         else:
             raise HTTPException(status_code=400, detail="Unsupported file format. Please upload CSV, XLSX, or JSON files.")
-        # Validate and normalize the data
-        normalized_data, errors = validate_and_normalize_data(data)
-        print(f"First 5 normalized rows: {normalized_data[:5]}")
+        # Validate and normalize the data off the event loop
+        normalized_data, errors = await asyncio.to_thread(validate_and_normalize_data, df)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("First 5 normalized rows: %s", normalized_data[:5])
         return normalized_data, errors
     except HTTPException:
         raise
@@ -1,13 +1,22 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, extract
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import Integer, Select, bindparam, cast, delete, func, and_, insert, select, update
 from datetime import date, datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple, Union
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
+import calendar
 
-from api.models.database import Payment, ExchangeRate
-from api.utils.currency_conversion import convert_tl_to_usd
+from api.models import database
+from api.models.database import (
+    Payment, ExchangeRate, DailyPaymentTotal, ChannelPaymentTotal, MonthlyPaymentTotal,
+    CUSTOMER_FTS_MIN_LENGTH, payments_fts
+)
+from api.utils.cache import clear_report_cache, invalidate_reports
+from api.utils.currency_conversion import convert_tl_to_usd, convert_tl_to_usd_bulk
 
+# Month names indexed 1-12, resolved once instead of formatting a date per row
+MONTH_NAMES = tuple(calendar.month_name)
 
-async def save_payment(db: Session, payment_data: Dict[str, Any]) -> Payment:
+
+def save_payment(db: Session, payment_data: Dict[str, Any]) -> Payment:
     """
     Saves a payment record to the database.
     
@@ -18,39 +27,57 @@ async def save_payment(db: Session, payment_data: Dict[str, Any]) -> Payment:
     Returns:
         The created Payment object
     """
+    row = _payment_row(payment_data)
+    
     # Convert TL to USD
-    amount_tl = payment_data['amount_tl']
-    payment_date = payment_data['payment_date']
+    row['amount_usd'], row['exchange_rate'] = convert_tl_to_usd(row['amount_tl'], row['payment_date'], db)
     
-    amount_usd, exchange_rate = convert_tl_to_usd(amount_tl, payment_date, db)
-    
-    # Create new payment object
-    payment = Payment(
-        payment_date=payment_date,
-        payment_time=payment_data.get('payment_time'),
-        customer_name=payment_data['customer_name'],
-        property_id=payment_data['property_id'],
-        property_name=payment_data.get('property_name'),
-        payment_channel=payment_data['payment_channel'],
-        amount_tl=amount_tl,
-        amount_usd=amount_usd,
-        exchange_rate=exchange_rate,
-        invoice_number=payment_data.get('invoice_number'),
-        notes=payment_data.get('notes')
-    )
-    
-    # Save to database
-    db.add(payment)
+    # Insert and load the new row in a single round trip
+    payment = db.execute(insert(Payment).values(**row).returning(Payment)).scalar_one()
     db.commit()
-    db.refresh(payment)
+    invalidate_reports([payment.payment_date])
     
     return payment
 
 
-async def save_bulk_payments(db: Session, payment_data_list: List[Dict[str, Any]]) -> Tuple[int, List[str]]:
+def _payment_row(payment_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Builds a plain column mapping for a bulk INSERT into the payments table.
+    The USD amount and exchange rate are filled in once rates are resolved.
+    
+    Args:
+        payment_data: Dictionary containing payment data
+        
+    Returns:
+        Dictionary keyed by payments table column names
+    """
+    payment_date = payment_data['payment_date']
+    if isinstance(payment_date, str):
+        payment_date = date.fromisoformat(payment_date)
+    
+    return {
+        'payment_date': payment_date,
+        'payment_time': payment_data.get('payment_time'),
+        'customer_name': payment_data['customer_name'],
+        'property_id': payment_data['property_id'],
+        'property_name': payment_data.get('property_name'),
+        'payment_channel': payment_data['payment_channel'],
+        'amount_tl': payment_data['amount_tl'],
+        'amount_usd': None,
+        'exchange_rate': None,
+        'invoice_number': payment_data.get('invoice_number'),
+        'notes': payment_data.get('notes')
+    }
+
+
+def save_bulk_payments(db: Session, payment_data_list: List[Dict[str, Any]]) -> Tuple[int, List[str]]:
     """
     Saves multiple payment records to the database.
     
+    Exchange rates for all distinct payment dates are resolved in one lookup,
+    then rows are converted in one vectorized pass and written with a single executemany
+    INSERT inside one transaction, bypassing the ORM unit of work.
+    
     Args:
         db: SQLAlchemy database session
         payment_data_list: List of dictionaries containing payment data
@@ -58,20 +85,193 @@ async def save_bulk_payments(db: Session, payment_data_list: List[Dict[str, Any]
     Returns:
         Tuple of (number of records saved, list of error messages)
     """
-    saved_count = 0
+    rows = []
+    row_numbers = []
     errors = []
     
     for idx, payment_data in enumerate(payment_data_list):
         try:
-            await save_payment(db, payment_data)
-            saved_count += 1
+            rows.append(_payment_row(payment_data))
+            row_numbers.append(idx + 1)
         except Exception as e:
             errors.append(f"Error saving record {idx+1}: {str(e)}")
     
+    if not rows:
+        return 0, errors
+    
+    try:
+        amounts_usd, rates = convert_tl_to_usd_bulk(
+            [row['amount_tl'] for row in rows], [row['payment_date'] for row in rows], db
+        )
+        for row, amount_usd, rate in zip(rows, amounts_usd.tolist(), rates.tolist()):
+            row['exchange_rate'] = rate
+            row['amount_usd'] = amount_usd
+    except Exception as e:
+        db.rollback()
+        errors.append(f"Error saving records: {str(e)}")
+        return 0, errors
+    
+    try:
+        db.execute(Payment.__table__.insert(), rows)
+        db.commit()
+        saved_count = len(rows)
+    except Exception:
+        db.rollback()
+        # Retry row by row so a single bad record doesn't reject the whole batch
+        saved_count = _insert_rows_individually(db, rows, row_numbers, errors)
+    
+    if saved_count:
+        invalidate_reports({row['payment_date'] for row in rows})
+    
     return saved_count, errors
 
 
-async def get_payments(
+def save_payment_batch(db: Session, payment_data_list: List[Dict[str, Any]]) -> List[Union[Payment, Exception]]:
+    """
+    Saves independent payment records in one INSERT ... RETURNING and one commit.
+    
+    Used to group-commit concurrent single-payment requests. Each record keeps
+    its own outcome: if the batch insert fails, records are retried one by one
+    so only the offending ones fail.
+    
+    Args:
+        db: SQLAlchemy database session
+        payment_data_list: List of dictionaries containing payment data
+        
+    Returns:
+        The created Payment object, or the error raised, for each record in order
+    """
+    results: List[Union[Payment, Exception]] = []
+    rows = []
+    for payment_data in payment_data_list:
+        try:
+            row = _payment_row(payment_data)
+        except Exception as e:
+            results.append(e)
+            continue
+        results.append(None)
+        rows.append(row)
+    
+    if not rows:
+        return results
+    
+    try:
+        # Same exact-date rate as save_payment and update_payment, so a payment
+        # stores the same rate whether it is created or edited; the per-date
+        # cache makes this one lookup per distinct date
+        for row in rows:
+            row['amount_usd'], row['exchange_rate'] = convert_tl_to_usd(row['amount_tl'], row['payment_date'], db)
+        
+        stmt = insert(Payment).returning(Payment, sort_by_parameter_order=True)
+        payments = iter(db.scalars(stmt, rows).all())
+        db.commit()
+        results = [result if result is not None else next(payments) for result in results]
+    except Exception:
+        db.rollback()
+        # Retry row by row so a single bad record doesn't fail the whole batch
+        retried = []
+        for result, payment_data in zip(results, payment_data_list):
+            if result is not None:
+                retried.append(result)
+                continue
+            try:
+                payment = save_payment(db, payment_data)
+                # Detach it so a later rollback in this loop doesn't expire it
+                db.expunge(payment)
+                retried.append(payment)
+            except Exception as e:
+                db.rollback()
+                retried.append(e)
+        return retried
+    
+    invalidate_reports({row['payment_date'] for row in rows})
+    return results
+
+
+def _insert_rows_individually(db: Session, rows: List[Dict[str, Any]], row_numbers: List[int], errors: List[str]) -> int:
+    """
+    Fallback for a failed bulk insert: inserts and commits each row on its own.
+    
+    Args:
+        db: SQLAlchemy database session
+        rows: Column mappings for the payments table
+        row_numbers: 1-based position of each row in the original import
+        errors: List that per-record error messages are appended to
+        
+    Returns:
+        Number of records saved
+    """
+    saved_count = 0
+    
+    for row_number, row in zip(row_numbers, rows):
+        try:
+            db.execute(Payment.__table__.insert(), row)
+            db.commit()
+            saved_count += 1
+        except Exception as e:
+            db.rollback()
+            errors.append(f"Error saving record {row_number}: {str(e)}")
+    
+    return saved_count
+
+
+def _customer_name_filter(customer_name: str):
+    """
+    Builds the case-insensitive substring filter on customer names, answered
+    from the payments_fts trigram index when it is available.
+    
+    Args:
+        customer_name: Text to search for within customer names
+        
+    Returns:
+        SQL expression for a WHERE clause
+    """
+    pattern = f"%{customer_name}%"
+    if database.customer_search_fts and len(customer_name) >= CUSTOMER_FTS_MIN_LENGTH:
+        matches = select(payments_fts.c.rowid).where(payments_fts.c.customer_name.like(pattern))
+        return Payment.id.in_(matches)
+    return Payment.customer_name.ilike(pattern)
+
+
+def _payments_statement(
+    start_date: Optional[date] = None, 
+    end_date: Optional[date] = None,
+    customer_name: Optional[str] = None,
+    property_id: Optional[str] = None,
+    payment_channel: Optional[str] = None
+) -> Select:
+    """
+    Builds the filtered, ordered SELECT shared by the payment listing helpers.
+    
+    Args:
+        start_date: Optional start date for filtering
+        end_date: Optional end date for filtering
+        customer_name: Optional customer name for filtering
+        property_id: Optional property ID for filtering
+        payment_channel: Optional payment channel for filtering
+        
+    Returns:
+        SELECT statement over Payment, newest first
+    """
+    stmt = select(Payment)
+    
+    # Apply filters if provided
+    if start_date:
+        stmt = stmt.where(Payment.payment_date >= start_date)
+    if end_date:
+        stmt = stmt.where(Payment.payment_date <= end_date)
+    if customer_name:
+        stmt = stmt.where(_customer_name_filter(customer_name))
+    if property_id:
+        stmt = stmt.where(Payment.property_id == property_id)
+    if payment_channel:
+        stmt = stmt.where(Payment.payment_channel == payment_channel)
+    
+    # Order by payment date (newest first)
+    return stmt.order_by(Payment.payment_date.desc(), Payment.id.desc())
+
+
+def get_payments(
     db: Session, 
     skip: int = 0, 
     limit: int = 100, 
@@ -97,25 +297,85 @@ async def get_payments(
     Returns:
         List of Payment objects
     """
-    query = db.query(Payment)
+    stmt = _payments_statement(start_date, end_date, customer_name, property_id, payment_channel)
+    # Fail loudly instead of lazy-loading a relationship once per listed row
+    stmt = stmt.options(raiseload('*'))
+    return db.execute(stmt.offset(skip).limit(limit)).scalars().all()
+
+
+def get_payment_rows(
+    db: Session, 
+    skip: int = 0, 
+    limit: int = 100, 
+    start_date: Optional[date] = None, 
+    end_date: Optional[date] = None,
+    customer_name: Optional[str] = None,
+    property_id: Optional[str] = None,
+    payment_channel: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Retrieves payment records as plain column mappings, without building ORM objects.
     
-    # Apply filters if provided
-    if start_date:
-        query = query.filter(Payment.payment_date >= start_date)
-    if end_date:
-        query = query.filter(Payment.payment_date <= end_date)
-    if customer_name:
-        query = query.filter(Payment.customer_name.ilike(f"%{customer_name}%"))
-    if property_id:
-        query = query.filter(Payment.property_id == property_id)
-    if payment_channel:
-        query = query.filter(Payment.payment_channel == payment_channel)
+    Args:
+        db: SQLAlchemy database session
+        skip: Number of records to skip (pagination)
+        limit: Maximum number of records to return
+        start_date: Optional start date for filtering
+        end_date: Optional end date for filtering
+        customer_name: Optional customer name for filtering
+        property_id: Optional property ID for filtering
+        payment_channel: Optional payment channel for filtering
+        
+    Returns:
+        List of row mappings keyed by column name
+    """
+    stmt = _payments_statement(start_date, end_date, customer_name, property_id, payment_channel)
+    stmt = stmt.with_only_columns(*Payment.__table__.columns)
+    return db.execute(stmt.offset(skip).limit(limit)).mappings().all()
+
+
+def iter_payment_rows(
+    db: Session, 
+    skip: int = 0, 
+    limit: Optional[int] = 100, 
+    start_date: Optional[date] = None, 
+    end_date: Optional[date] = None,
+    customer_name: Optional[str] = None,
+    property_id: Optional[str] = None,
+    payment_channel: Optional[str] = None,
+    batch_size: int = 1000
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields payment records as plain dictionaries, fetched in batches.
     
-    # Apply pagination and order by payment date (newest first)
-    return query.order_by(Payment.payment_date.desc(), Payment.id.desc()).offset(skip).limit(limit).all()
+    Args:
+        db: SQLAlchemy database session
+        skip: Number of records to skip (pagination)
+        limit: Maximum number of records to return, or None for all matches
+        start_date: Optional start date for filtering
+        end_date: Optional end date for filtering
+        customer_name: Optional customer name for filtering
+        property_id: Optional property ID for filtering
+        payment_channel: Optional payment channel for filtering
+        batch_size: Number of rows fetched from the cursor per batch
+        
+    Yields:
+        Dictionaries keyed by column name
+    """
+    stmt = _payments_statement(start_date, end_date, customer_name, property_id, payment_channel)
+    stmt = stmt.with_only_columns(*Payment.__table__.columns)
+    stmt = stmt.offset(skip).limit(limit).execution_options(yield_per=batch_size)
+    for row in db.execute(stmt).mappings():
+        yield dict(row)
+
+
+# Fixed-shape hot queries are built once at import; executions only bind
+# parameters, so statement construction and cache-key generation are not
+# repeated per call
+PAYMENT_BY_ID_STMT = select(Payment).where(Payment.id == bindparam('payment_id'))
 
 
-async def get_payment_by_id(db: Session, payment_id: int) -> Optional[Payment]:
+def get_payment_by_id(db: Session, payment_id: int) -> Optional[Payment]:
     """
     Retrieves a payment record by its ID.
     
@@ -126,10 +386,10 @@ async def get_payment_by_id(db: Session, payment_id: int) -> Optional[Payment]:
     Returns:
         Payment object or None if not found
     """
-    return db.query(Payment).filter(Payment.id == payment_id).first()
+    return db.execute(PAYMENT_BY_ID_STMT, {'payment_id': payment_id}).scalars().first()
 
 
-async def update_payment(db: Session, payment_id: int, payment_data: Dict[str, Any]) -> Optional[Payment]:
+def update_payment(db: Session, payment_id: int, payment_data: Dict[str, Any]) -> Optional[Payment]:
     """
     Updates an existing payment record.
     
@@ -141,30 +401,41 @@ async def update_payment(db: Session, payment_id: int, payment_data: Dict[str, A
     Returns:
         Updated Payment object or None if not found
     """
-    payment = await get_payment_by_id(db, payment_id)
-    if not payment:
-        return None
-    
     # Update fields if provided in the payload
-    for field, value in payment_data.items():
-        if hasattr(payment, field) and field != 'id':
-            setattr(payment, field, value)
+    values = {
+        field: value for field, value in payment_data.items()
+        if field in Payment.__table__.columns and field != 'id'
+    }
     
     # Recalculate USD amount if TL amount or date changed
-    if 'amount_tl' in payment_data or 'payment_date' in payment_data:
-        amount_usd, exchange_rate = convert_tl_to_usd(payment.amount_tl, payment.payment_date, db)
-        payment.amount_usd = amount_usd
-        payment.exchange_rate = exchange_rate
+    if 'amount_tl' in values or 'payment_date' in values:
+        if 'amount_tl' in values and 'payment_date' in values:
+            amount_tl, payment_date = values['amount_tl'], values['payment_date']
+        else:
+            current = get_payment_by_id(db, payment_id)
+            if not current:
+                return None
+            amount_tl = values.get('amount_tl', current.amount_tl)
+            payment_date = values.get('payment_date', current.payment_date)
+        values['amount_usd'], values['exchange_rate'] = convert_tl_to_usd(amount_tl, payment_date, db)
     
-    payment.updated_at = datetime.utcnow()
+    values['updated_at'] = datetime.utcnow()
     
+    # Update and load the row in a single round trip
+    payment = db.execute(
+        update(Payment).where(Payment.id == payment_id).values(**values).returning(Payment)
+    ).scalar_one_or_none()
     db.commit()
-    db.refresh(payment)
+    if 'payment_date' in values:
+        # The payment may have left a date range whose reports still include it
+        clear_report_cache()
+    elif payment:
+        invalidate_reports([payment.payment_date])
     
     return payment
 
 
-async def delete_payment(db: Session, payment_id: int) -> bool:
+def delete_payment(db: Session, payment_id: int) -> bool:
     """
     Deletes a payment record.
     
@@ -175,60 +446,162 @@ async def delete_payment(db: Session, payment_id: int) -> bool:
     Returns:
         True if payment was deleted, False if not found
     """
-    payment = await get_payment_by_id(db, payment_id)
-    if not payment:
+    # Delete and learn the affected date in a single round trip
+    payment_date = db.execute(
+        delete(Payment).where(Payment.id == payment_id).returning(Payment.payment_date)
+    ).scalar_one_or_none()
+    if payment_date is None:
+        db.rollback()
         return False
     
-    db.delete(payment)
     db.commit()
+    invalidate_reports([payment_date])
     
     return True
 
 
-async def get_daily_totals(db: Session, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+def get_payment_totals(
+    db: Session, 
+    start_date: Optional[date] = None, 
+    end_date: Optional[date] = None,
+    customer_name: Optional[str] = None,
+    property_id: Optional[str] = None,
+    payment_channel: Optional[str] = None
+) -> Dict[str, Any]:
     """
-    Gets daily payment totals in USD.
+    Sums the payments matching the listing filters in a single aggregate query.
+    
+    The amounts are summed as integer kuruş/cents in SQL, so the totals are exact.
     
     Args:
         db: SQLAlchemy database session
-        start_date: Start date for the report
-        end_date: End date for the report
+        start_date: Optional start date for filtering
+        end_date: Optional end date for filtering
+        customer_name: Optional customer name for filtering
+        property_id: Optional property ID for filtering
+        payment_channel: Optional payment channel for filtering
         
     Returns:
-        List of daily total dictionaries
+        Dictionary with total_tl, total_usd and payment_count
     """
-    daily_totals = db.query(
-        Payment.payment_date,
+    stmt = _payments_statement(start_date, end_date, customer_name, property_id, payment_channel)
+    stmt = stmt.with_only_columns(
         func.sum(Payment.amount_tl).label('total_tl'),
         func.sum(Payment.amount_usd).label('total_usd'),
         func.count(Payment.id).label('payment_count')
-    ).filter(
-        and_(
-            Payment.payment_date >= start_date,
-            Payment.payment_date <= end_date
-        )
-    ).group_by(
-        Payment.payment_date
-    ).order_by(
-        Payment.payment_date
-    ).all()
+    ).order_by(None)
     
-    result = []
-    for row in daily_totals:
-        result.append({
-            'date': row.payment_date.isoformat(),
+    row = db.execute(stmt).mappings().one()
+    return {
+        'total_tl': float(row['total_tl'] or 0),
+        'total_usd': float(row['total_usd'] or 0),
+        'payment_count': row['payment_count']
+    }
+
+
+DAILY_TOTALS_STMT = select(DailyPaymentTotal).where(
+    DailyPaymentTotal.date.between(bindparam('start_date'), bindparam('end_date'))
+).order_by(
+    DailyPaymentTotal.date
+)
+
+
+def get_daily_totals(db: Session, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+    """
+    Gets daily payment totals in USD.
+    
+    Read from the mv_daily_totals roll-up, so the cost is one row per day
+    rather than one per payment.
+    
+    Args:
+        db: SQLAlchemy database session
+        start_date: Start date for the report
+        end_date: End date for the report
+        
+    Returns:
+        List of daily total dictionaries
+    """
+    params = {'start_date': start_date, 'end_date': end_date}
+    return [
+        {
+            'date': row.date.isoformat(),
             'total_tl': float(row.total_tl),
             'total_usd': float(row.total_usd),
             'payment_count': row.payment_count
-        })
+        }
+        for row in db.execute(DAILY_TOTALS_STMT, params).scalars()
+    ]
+
+
+_thursday = func.date(DailyPaymentTotal.date, '-3 days', 'weekday 4')
+WEEKLY_TOTALS_STMT = select(
+    cast(func.strftime('%Y', _thursday), Integer).label('year'),
+    ((cast(func.strftime('%j', _thursday), Integer) - 1) // 7 + 1).label('week'),
+    func.min(DailyPaymentTotal.date).label('start_date'),
+    func.max(DailyPaymentTotal.date).label('end_date'),
+    func.sum(DailyPaymentTotal.total_tl).label('total_tl'),
+    func.sum(DailyPaymentTotal.total_usd).label('total_usd'),
+    func.sum(DailyPaymentTotal.payment_count).label('payment_count')
+).where(
+    DailyPaymentTotal.date.between(bindparam('start_date'), bindparam('end_date'))
+).group_by(
+    _thursday
+).order_by(
+    _thursday
+)
+
+
+def get_weekly_totals(db: Session, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+    """
+    Gets ISO week payment totals, grouped in SQL over the mv_daily_totals roll-up.
     
-    return result
+    Days are bucketed by the Thursday of their ISO week, which also fixes the
+    ISO year and week number.
+    
+    Args:
+        db: SQLAlchemy database session
+        start_date: Start date for the report
+        end_date: End date for the report
+        
+    Returns:
+        List of weekly total dictionaries
+    """
+    params = {'start_date': start_date, 'end_date': end_date}
+    return [
+        {
+            'year': row['year'],
+            'week': row['week'],
+            'start_date': row['start_date'].isoformat(),
+            'end_date': row['end_date'].isoformat(),
+            'total_usd': float(row['total_usd']),
+            'total_tl': float(row['total_tl']),
+            'payment_count': row['payment_count']
+        }
+        for row in db.execute(WEEKLY_TOTALS_STMT, params).mappings()
+    ]
+
+
+_channel_total_usd = func.sum(ChannelPaymentTotal.total_usd).label('total_usd')
+CHANNEL_SUMMARY_STMT = select(
+    ChannelPaymentTotal.payment_channel,
+    func.sum(ChannelPaymentTotal.total_tl).label('total_tl'),
+    _channel_total_usd,
+    func.sum(ChannelPaymentTotal.payment_count).label('payment_count')
+).where(
+    ChannelPaymentTotal.date.between(bindparam('start_date'), bindparam('end_date'))
+).group_by(
+    ChannelPaymentTotal.payment_channel
+).order_by(
+    _channel_total_usd.desc()
+)
 
 
-async def get_channel_summary(db: Session, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+def get_channel_summary(db: Session, start_date: date, end_date: date) -> List[Dict[str, Any]]:
     """
     Gets payment channel summary.
     
+    Aggregates the per-day buckets of the mv_channel_totals roll-up.
+    
     Args:
         db: SQLAlchemy database session
         start_date: Start date for the report
@@ -237,38 +610,31 @@ async def get_channel_summary(db: Session, start_date: date, end_date: date) ->
     Returns:
         List of channel summary dictionaries
     """
-    channel_summary = db.query(
-        Payment.payment_channel,
-        func.sum(Payment.amount_tl).label('total_tl'),
-        func.sum(Payment.amount_usd).label('total_usd'),
-        func.count(Payment.id).label('payment_count')
-    ).filter(
-        and_(
-            Payment.payment_date >= start_date,
-            Payment.payment_date <= end_date
-        )
-    ).group_by(
-        Payment.payment_channel
-    ).order_by(
-        func.sum(Payment.amount_usd).desc()
-    ).all()
-    
-    result = []
-    for row in channel_summary:
-        result.append({
-            'payment_channel': row.payment_channel,
-            'total_tl': float(row.total_tl),
-            'total_usd': float(row.total_usd),
-            'payment_count': row.payment_count
-        })
-    
-    return result
+    params = {'start_date': start_date, 'end_date': end_date}
+    return [
+        {
+            'payment_channel': row['payment_channel'],
+            'total_tl': float(row['total_tl']),
+            'total_usd': float(row['total_usd']),
+            'payment_count': row['payment_count']
+        }
+        for row in db.execute(CHANNEL_SUMMARY_STMT, params).mappings()
+    ]
+
+
+MONTHLY_SUMMARY_STMT = select(MonthlyPaymentTotal).where(
+    MonthlyPaymentTotal.year == bindparam('year')
+).order_by(
+    MonthlyPaymentTotal.month
+)
 
 
-async def get_monthly_summary(db: Session, year: int) -> List[Dict[str, Any]]:
+def get_monthly_summary(db: Session, year: int) -> List[Dict[str, Any]]:
     """
     Gets monthly payment summary for a specific year.
     
+    Read from the mv_monthly_totals roll-up (at most twelve rows).
+    
     Args:
         db: SQLAlchemy database session
         year: The year for the report
@@ -276,28 +642,14 @@ async def get_monthly_summary(db: Session, year: int) -> List[Dict[str, Any]]:
     Returns:
         List of monthly summary dictionaries
     """
-    monthly_summary = db.query(
-        extract('month', Payment.payment_date).label('month'),
-        func.sum(Payment.amount_tl).label('total_tl'),
-        func.sum(Payment.amount_usd).label('total_usd'),
-        func.count(Payment.id).label('payment_count')
-    ).filter(
-        extract('year', Payment.payment_date) == year
-    ).group_by(
-        extract('month', Payment.payment_date)
-    ).order_by(
-        extract('month', Payment.payment_date)
-    ).all()
-    
     result = []
-    for row in monthly_summary:
-        month_date = date(year, int(row.month), 1)
+    for row in db.execute(MONTHLY_SUMMARY_STMT, {'year': year}).scalars():
         result.append({
-            'month': month_date.strftime('%B'),  # Month name
-            'month_num': int(row.month),
+            'month': MONTH_NAMES[row.month],  # Month name
+            'month_num': row.month,
             'total_tl': float(row.total_tl),
             'total_usd': float(row.total_usd),
             'payment_count': row.payment_count
         })
     
-    return result
\ No newline at end of file
+    return result
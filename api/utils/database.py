@@ -1,36 +1,166 @@
 import sqlite3
+import queue
+import threading
 from contextlib import contextmanager
 import os
 from pathlib import Path
 
+# Resolve the database location once at import time
+DATABASE_PATH = os.path.join(Path(__file__).parent.parent.parent, "tahsilat_data.db")
+
+# Bounds for the shared connection pool
+POOL_MIN_SIZE = 4
+POOL_MAX_SIZE = 16
+
+# Seconds acquire() waits for a connection to be released once all are in use
+POOL_ACQUIRE_TIMEOUT = 30
+
+# Rows pulled per fetchmany() call when reading result sets
+FETCH_BATCH_SIZE = 1000
+
+# Tuning applied once to every pooled connection
+CONNECTION_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "cache_size=-65536",
+    "temp_store=MEMORY",
+)
+
+# Seconds a standalone connection waits on another writer's lock
+STANDALONE_BUSY_TIMEOUT = 5
+
 def get_db_path():
     """Get the absolute path to the SQLite database."""
-    # Get the base directory (project root)
-    base_dir = Path(__file__).parent.parent.parent
-    db_path = os.path.join(base_dir, "tahsilat_data.db")
-    return db_path
+    return DATABASE_PATH
+
+def open_db(db_path=DATABASE_PATH):
+    """
+    Open a standalone connection in autocommit mode with the pool's pragmas applied.
+    
+    Used by the maintenance and deploy-check scripts; WAL lets the running
+    dev server keep reading while one of them is connected.
+    """
+    conn = sqlite3.connect(str(db_path), isolation_level=None, timeout=STANDALONE_BUSY_TIMEOUT)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(f"PRAGMA {pragma}")
+    return conn
+
+class ConnectionPool:
+    """
+    Process-wide pool of reusable SQLite connections.
+    
+    Connections are opened lazily up to max_size and handed back after use,
+    so each one keeps its page cache warm across queries. At most min_size
+    idle connections are retained once load drops.
+    """
+    
+    def __init__(self, db_path, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE, acquire_timeout=POOL_ACQUIRE_TIMEOUT):
+        self.db_path = db_path
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0
+        self.queries_executed = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        conn.row_factory = sqlite3.Row  # This enables column access by name
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma}")
+        return conn
+
+    def acquire(self):
+        """
+        Take an idle connection, opening a new one while under max_size.
+        
+        At max_size, waits up to acquire_timeout seconds for a release and
+        then raises TimeoutError instead of blocking forever.
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._size < self.max_size:
+                self._size += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._size -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"Connection pool exhausted: all {self.max_size} connections "
+                f"stayed in use for {self.acquire_timeout}s"
+            ) from None
+
+    def release(self, conn):
+        """Return a connection to the pool, closing surplus idle ones."""
+        conn.rollback()
+        with self._lock:
+            if self._idle.qsize() >= self.min_size and self._size > self.min_size:
+                self._size -= 1
+                conn.close()
+                return
+        self._idle.put(conn)
+
+    def record_query(self):
+        """Count one query run through the pool; callers run on many threads."""
+        with self._lock:
+            self.queries_executed += 1
+
+    def get_stats(self):
+        """Report pool occupancy and the number of queries run through it."""
+        return {
+            "size": self._size,
+            "free": self._idle.qsize(),
+            "max_size": self.max_size,
+            "queries_executed": self.queries_executed,
+        }
+
+pool = ConnectionPool(DATABASE_PATH)
 
 @contextmanager
 def get_db_connection():
-    """Context manager for database connections."""
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row  # This enables column access by name
+    """Context manager lending a pooled database connection."""
+    conn = pool.acquire()
     try:
         yield conn
     finally:
-        conn.close()
+        pool.release(conn)
 
 def execute_query(query, params=(), fetch_one=False):
     """Execute a query and return results."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(query, params)
+        pool.record_query()
         
         if query.strip().upper().startswith(('SELECT', 'PRAGMA')):
             if fetch_one:
-                return dict(cursor.fetchone()) if cursor.fetchone() else None
-            return [dict(row) for row in cursor.fetchall()]
+                row = cursor.fetchone()
+                return dict(row) if row else None
+            # Convert rows batch by batch instead of materializing fetchall() first
+            cursor.arraysize = FETCH_BATCH_SIZE
+            results = []
+            while batch := cursor.fetchmany():
+                results.extend(dict(row) for row in batch)
+            return results
         else:
             conn.commit()
-            return cursor.lastrowid
\ No newline at end of file
+            return cursor.lastrowid
+
+def execute_scalar(query, params=()):
+    """Execute a query and return the first column of its first row."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        # Plain tuples are enough for a single value, skip the Row factory
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        pool.record_query()
+        row = cursor.fetchone()
+        return row[0] if row else None
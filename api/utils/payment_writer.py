@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from api.models.database import Payment, SessionLocal
+from api.utils.data_storage import save_payment_batch
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on payments written by one INSERT and commit
+WRITE_BATCH_SIZE = 500
+
+
+class PaymentWriter:
+    """
+    Group-commits single payment creations from concurrent requests.
+
+    Requests enqueue their payment and await the stored row. One worker task
+    takes everything queued so far (up to WRITE_BATCH_SIZE) and writes it with
+    a single INSERT ... RETURNING and commit, so concurrent writers share one
+    transaction instead of queueing on SQLite's write lock. A lone request is
+    written immediately; batches only form while a previous write is running.
+    """
+
+    def __init__(self, batch_size: int = WRITE_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Starts the worker task on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Writes any queued payments, then stops the worker task."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def submit(self, payment_data: Dict[str, Any]) -> Payment:
+        """
+        Queues a payment for the next batch and waits for it to be stored.
+        
+        The worker is started on first use when start() has not been called,
+        e.g. when the app runs without its lifespan.
+        
+        Args:
+            payment_data: Dictionary containing payment data
+        
+        Returns:
+            The created Payment object
+        """
+        if self._task is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((payment_data, future))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            
+            try:
+                results = await asyncio.to_thread(_write_batch, [payment_data for payment_data, _ in batch])
+            except Exception as e:
+                logger.exception("Payment batch write failed")
+                results = [e] * len(batch)
+            
+            for (_, future), result in zip(batch, results):
+                self._queue.task_done()
+                if future.done():
+                    # The waiting request was cancelled
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+def _write_batch(payment_data_list: List[Dict[str, Any]]) -> List[Union[Payment, Exception]]:
+    """Stores one batch with its own session, in a worker thread."""
+    with SessionLocal() as db:
+        return save_payment_batch(db, payment_data_list)
+
+
+payment_writer = PaymentWriter()
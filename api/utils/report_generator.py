@@ -2,12 +2,41 @@ from sqlalchemy.orm import Session
 from datetime import date, datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 import calendar
-import pandas as pd
+from operator import itemgetter
 
-from api.utils.data_storage import get_daily_totals, get_channel_summary, get_monthly_summary, get_payments
+from api.utils.cache import cached_report
+from api.utils.data_storage import get_daily_totals, get_weekly_totals, get_channel_summary, get_monthly_summary, iter_payment_rows, get_payment_totals
 
 
-async def generate_daily_report(db: Session, start_date: date, end_date: date) -> Dict[str, Any]:
+# Detail rows returned per property/customer report page; totals always cover
+# every matching payment
+REPORT_PAGE_SIZE = 1000
+
+# Pulls the three summed fields out of a report row in one C-level call
+_TOTAL_FIELDS = itemgetter('total_usd', 'total_tl', 'payment_count')
+
+
+def _sum_totals(rows: List[Dict[str, Any]]) -> Tuple[float, float, int]:
+    """
+    Sums USD, TL and payment counts over report rows.
+    
+    The rows are transposed once with itemgetter/zip so each column is added
+    by the builtin sum over a tuple, instead of three generator passes.
+    
+    Args:
+        rows: Report rows carrying total_usd, total_tl and payment_count
+        
+    Returns:
+        Tuple of (total USD, total TL, total payment count)
+    """
+    if not rows:
+        return 0, 0, 0
+    usd, tl, counts = zip(*map(_TOTAL_FIELDS, rows))
+    return sum(usd), sum(tl), sum(counts)
+
+
+@cached_report
+def generate_daily_report(db: Session, start_date: date, end_date: date) -> Dict[str, Any]:
     """
     Generates a daily USD payment report.
     
@@ -19,12 +48,10 @@ async def generate_daily_report(db: Session, start_date: date, end_date: date) -
     Returns:
         A dictionary containing the report data
     """
-    daily_totals = await get_daily_totals(db, start_date, end_date)
+    daily_totals = get_daily_totals(db, start_date, end_date)
     
     # Calculate overall summary
-    total_usd = sum(day['total_usd'] for day in daily_totals)
-    total_tl = sum(day['total_tl'] for day in daily_totals)
-    total_count = sum(day['payment_count'] for day in daily_totals)
+    total_usd, total_tl, total_count = _sum_totals(daily_totals)
     avg_usd_per_day = total_usd / len(daily_totals) if daily_totals else 0
     
     return {
@@ -44,7 +71,8 @@ async def generate_daily_report(db: Session, start_date: date, end_date: date) -
     }
 
 
-async def generate_weekly_report(db: Session, start_date: date, end_date: date) -> Dict[str, Any]:
+@cached_report
+def generate_weekly_report(db: Session, start_date: date, end_date: date) -> Dict[str, Any]:
     """
     Generates a weekly summary report.
     
@@ -56,60 +84,11 @@ async def generate_weekly_report(db: Session, start_date: date, end_date: date)
     Returns:
         A dictionary containing the report data
     """
-    # Get daily data
-    daily_totals = await get_daily_totals(db, start_date, end_date)
-    
-    # Group by ISO week
-    df = pd.DataFrame(daily_totals)
-    if df.empty:
-        return {
-            "report_name": "Weekly Summary Report",
-            "date_range": {
-                "start_date": start_date.isoformat(),
-                "end_date": end_date.isoformat(),
-                "days": (end_date - start_date).days + 1
-            },
-            "data": [],
-            "summary": {
-                "total_usd": 0,
-                "total_tl": 0,
-                "total_count": 0,
-                "week_count": 0
-            }
-        }
-    
-    # Convert date string to datetime
-    df['date'] = pd.to_datetime(df['date'])
-    
-    # Extract year and week number
-    df['year'] = df['date'].dt.isocalendar().year
-    df['week'] = df['date'].dt.isocalendar().week
-    
-    # Group by year and week
-    weekly_data = df.groupby(['year', 'week']).agg({
-        'total_usd': 'sum',
-        'total_tl': 'sum',
-        'payment_count': 'sum',
-        'date': ['min', 'max']
-    }).reset_index()
-    
-    # Format the result
-    result = []
-    for _, row in weekly_data.iterrows():
-        result.append({
-            'year': int(row['year']),
-            'week': int(row['week']),
-            'start_date': row[('date', 'min')].date().isoformat(),
-            'end_date': row[('date', 'max')].date().isoformat(),
-            'total_usd': float(row[('total_usd', 'sum')]),
-            'total_tl': float(row[('total_tl', 'sum')]),
-            'payment_count': int(row[('payment_count', 'sum')])
-        })
+    # Weekly buckets are grouped by the database
+    result = get_weekly_totals(db, start_date, end_date)
     
     # Calculate overall summary
-    total_usd = sum(week['total_usd'] for week in result)
-    total_tl = sum(week['total_tl'] for week in result)
-    total_count = sum(week['payment_count'] for week in result)
+    total_usd, total_tl, total_count = _sum_totals(result)
     
     return {
         "report_name": "Weekly Summary Report",
@@ -128,7 +107,8 @@ async def generate_weekly_report(db: Session, start_date: date, end_date: date)
     }
 
 
-async def generate_monthly_channel_report(db: Session, year: int, month: int) -> Dict[str, Any]:
+@cached_report
+def generate_monthly_channel_report(db: Session, year: int, month: int) -> Dict[str, Any]:
     """
     Generates a monthly payment channel report.
     
@@ -146,12 +126,10 @@ async def generate_monthly_channel_report(db: Session, year: int, month: int) ->
     end_date = date(year, month, last_day)
     
     # Get channel summary
-    channel_data = await get_channel_summary(db, start_date, end_date)
+    channel_data = get_channel_summary(db, start_date, end_date)
     
     # Calculate overall summary
-    total_usd = sum(channel['total_usd'] for channel in channel_data)
-    total_tl = sum(channel['total_tl'] for channel in channel_data)
-    total_count = sum(channel['payment_count'] for channel in channel_data)
+    total_usd, total_tl, total_count = _sum_totals(channel_data)
     
     # Calculate percentage of each channel
     for channel in channel_data:
@@ -176,7 +154,8 @@ async def generate_monthly_channel_report(db: Session, year: int, month: int) ->
     }
 
 
-async def generate_yearly_summary(db: Session, year: int) -> Dict[str, Any]:
+@cached_report
+def generate_yearly_summary(db: Session, year: int) -> Dict[str, Any]:
     """
     Generates a yearly summary report.
     
@@ -188,12 +167,10 @@ async def generate_yearly_summary(db: Session, year: int) -> Dict[str, Any]:
         A dictionary containing the report data
     """
     # Get monthly summary
-    monthly_data = await get_monthly_summary(db, year)
+    monthly_data = get_monthly_summary(db, year)
     
     # Calculate overall summary
-    total_usd = sum(month['total_usd'] for month in monthly_data)
-    total_tl = sum(month['total_tl'] for month in monthly_data)
-    total_count = sum(month['payment_count'] for month in monthly_data)
+    total_usd, total_tl, total_count = _sum_totals(monthly_data)
     avg_usd_per_month = total_usd / 12 if monthly_data else 0
     
     return {
@@ -213,7 +190,8 @@ async def generate_yearly_summary(db: Session, year: int) -> Dict[str, Any]:
     }
 
 
-async def generate_property_report(db: Session, property_id: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict[str, Any]:
+@cached_report
+def generate_property_report(db: Session, property_id: str, start_date: Optional[date] = None, end_date: Optional[date] = None, skip: int = 0, limit: int = REPORT_PAGE_SIZE) -> Dict[str, Any]:
     """
     Generates a report for a specific property.
     
@@ -222,6 +200,8 @@ async def generate_property_report(db: Session, property_id: str, start_date: Op
         property_id: The property ID to report on
         start_date: Optional start date for the report
         end_date: Optional end date for the report
+        skip: Number of detail rows to skip (pagination)
+        limit: Maximum number of detail rows to return
         
     Returns:
         A dictionary containing the report data
@@ -232,25 +212,21 @@ async def generate_property_report(db: Session, property_id: str, start_date: Op
     if not end_date:
         end_date = date.today()
     
-    # Get payments for the property
-    payments = await get_payments(
+    # One page of the property's payments, streamed from the cursor
+    payment_data = list(iter_payment_rows(
         db, 
-        skip=0, 
-        limit=1000, 
+        skip=skip, 
+        limit=limit, 
         start_date=start_date, 
         end_date=end_date,
         property_id=property_id
-    )
+    ))
     
-    payment_data = [payment.to_dict() for payment in payments]
-    
-    # Calculate summary
-    total_usd = sum(payment['amount_usd'] for payment in payment_data)
-    total_tl = sum(payment['amount_tl'] for payment in payment_data)
-    payment_count = len(payment_data)
+    # Totals come from one aggregate query over every matching payment
+    totals = get_payment_totals(db, start_date=start_date, end_date=end_date, property_id=property_id)
     
     # Get property name from first payment (if available)
-    property_name = payments[0].property_name if payments else "Unknown Property"
+    property_name = payment_data[0]['property_name'] if payment_data else "Unknown Property"
     
     return {
         "report_name": "Property Payment Report",
@@ -264,15 +240,12 @@ async def generate_property_report(db: Session, property_id: str, start_date: Op
             "days": (end_date - start_date).days + 1
         },
         "data": payment_data,
-        "summary": {
-            "total_usd": total_usd,
-            "total_tl": total_tl,
-            "payment_count": payment_count
-        }
+        "summary": totals
     }
 
 
-async def generate_customer_report(db: Session, customer_name: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict[str, Any]:
+@cached_report
+def generate_customer_report(db: Session, customer_name: str, start_date: Optional[date] = None, end_date: Optional[date] = None, skip: int = 0, limit: int = REPORT_PAGE_SIZE) -> Dict[str, Any]:
     """
     Generates a report for a specific customer.
     
@@ -281,6 +254,8 @@ async def generate_customer_report(db: Session, customer_name: str, start_date:
         customer_name: The customer name to search for
         start_date: Optional start date for the report
         end_date: Optional end date for the report
+        skip: Number of detail rows to skip (pagination)
+        limit: Maximum number of detail rows to return
         
     Returns:
         A dictionary containing the report data
@@ -291,22 +266,18 @@ async def generate_customer_report(db: Session, customer_name: str, start_date:
     if not end_date:
         end_date = date.today()
     
-    # Get payments for the customer
-    payments = await get_payments(
+    # One page of the customer's payments, streamed from the cursor
+    payment_data = list(iter_payment_rows(
         db, 
-        skip=0, 
-        limit=1000, 
+        skip=skip, 
+        limit=limit, 
         start_date=start_date, 
         end_date=end_date,
         customer_name=customer_name
-    )
+    ))
     
-    payment_data = [payment.to_dict() for payment in payments]
-    
-    # Calculate summary
-    total_usd = sum(payment['amount_usd'] for payment in payment_data)
-    total_tl = sum(payment['amount_tl'] for payment in payment_data)
-    payment_count = len(payment_data)
+    # Totals come from one aggregate query over every matching payment
+    totals = get_payment_totals(db, start_date=start_date, end_date=end_date, customer_name=customer_name)
     
     return {
         "report_name": "Customer Payment Report",
@@ -319,9 +290,5 @@ async def generate_customer_report(db: Session, customer_name: str, start_date:
             "days": (end_date - start_date).days + 1
         },
         "data": payment_data,
-        "summary": {
-            "total_usd": total_usd,
-            "total_tl": total_tl,
-            "payment_count": payment_count
-        }
+        "summary": totals
     }
\ No newline at end of file
@@ -22,67 +22,67 @@ def add_test_payment():
         return False
     
     try:
-        # Connect to the database
-        conn = sqlite3.connect(str(db_path))
+        # Connect in autocommit mode so the transaction below is opened explicitly
+        conn = sqlite3.connect(str(db_path), isolation_level=None)
         cursor = conn.cursor()
         
         # Get today's date
         today = date.today()
         today_str = today.isoformat()
         
-        # Insert a test payment for today
-        cursor.execute('''
-            INSERT INTO payments (
-                customer_name, payment_date, payment_method,
-                amount_due, currency_due, amount_paid, currency_paid,
-                year, month, project_name, status
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            "Test Customer",           # customer_name
-            today_str,                 # payment_date
-            "Bank Transfer",           # payment_method
-            1000.00,                   # amount_due
-            "TRY",                     # currency_due
-            1000.00,                   # amount_paid
-            "TRY",                     # currency_paid
-            today.year,                # year
-            today.month,               # month
-            "Test Project",            # project_name
-            "Completed"                # status
-        ))
-        
         # Add another test payment for a specific month (August)
         august_date = date(today.year, 8, 15)
         august_str = august_date.isoformat()
         
-        cursor.execute('''
-            INSERT INTO payments (
-                customer_name, payment_date, payment_method,
-                amount_due, currency_due, amount_paid, currency_paid,
-                year, month, project_name, status
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            "August Customer",         # customer_name
-            august_str,                # payment_date
-            "Cash",                    # payment_method
-            2000.00,                   # amount_due
-            "TRY",                     # currency_due
-            2000.00,                   # amount_paid
-            "TRY",                     # currency_paid
-            august_date.year,          # year
-            august_date.month,         # month
-            "August Project",          # project_name
-            "Completed"                # status
-        ))
+        rows = [
+            (
+                "Test Customer",           # customer_name
+                today_str,                 # payment_date
+                "Bank Transfer",           # payment_method
+                1000.00,                   # amount_due
+                "TRY",                     # currency_due
+                1000.00,                   # amount_paid
+                "TRY",                     # currency_paid
+                today.year,                # year
+                today.month,               # month
+                "Test Project",            # project_name
+                "Completed"                # status
+            ),
+            (
+                "August Customer",         # customer_name
+                august_str,                # payment_date
+                "Cash",                    # payment_method
+                2000.00,                   # amount_due
+                "TRY",                     # currency_due
+                2000.00,                   # amount_paid
+                "TRY",                     # currency_paid
+                august_date.year,          # year
+                august_date.month,         # month
+                "August Project",          # project_name
+                "Completed"                # status
+            ),
+        ]
         
-        # Commit the changes and close the connection
-        conn.commit()
+        # Insert both test payments in one write transaction; BEGIN IMMEDIATE takes
+        # the write lock up front instead of upgrading a deferred transaction
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.executemany('''
+                INSERT INTO payments (
+                    customer_name, payment_date, payment_method,
+                    amount_due, currency_due, amount_paid, currency_paid,
+                    year, month, project_name, status
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
         
         # Verify the insertion
         cursor.execute("SELECT id, customer_name, payment_date, year, month FROM payments")
-        rows = cursor.fetchall()
         print("\nTest payments added to the database:")
-        for row in rows:
+        for row in cursor:
             print(f"ID: {row[0]}, Customer: {row[1]}, Date: {row[2]}, Year: {row[3]}, Month: {row[4]}")
         
         conn.close()
@@ -38,30 +38,26 @@ def get_table_stats():
         stats = {}
         total_rows = 0
         
-        # Get count of rows in each table
-        for table in tables:
-            cursor.execute(f"SELECT COUNT(*) FROM {table};")
-            count = cursor.fetchone()[0]
-            stats[table] = count
-            total_rows += count
+        # Count the rows of every table in a single UNION ALL round trip
+        if tables:
+            count_query = " UNION ALL ".join(
+                f"SELECT ?, COUNT(*) FROM \"{table}\"" for table in tables
+            )
+            for table, count in cursor.execute(count_query, tables):
+                stats[table] = count
+                total_rows += count
         
         # Additional stats for payments if they exist
         if "payments" in tables and stats["payments"] > 0:
-            # Get payment statistics
-            cursor.execute("SELECT COUNT(DISTINCT project_name) FROM payments WHERE project_name IS NOT NULL;")
-            project_count = cursor.fetchone()[0]
+            # COUNT(DISTINCT), MIN and MAX all skip NULLs, so one scan covers every statistic
+            cursor.execute("""
+                SELECT COUNT(DISTINCT project_name), COUNT(DISTINCT customer_name),
+                       MIN(payment_date), MAX(payment_date)
+                FROM payments;
+            """)
+            project_count, customer_count, min_date, max_date = cursor.fetchone()
             stats["unique_projects"] = project_count
-            
-            cursor.execute("SELECT COUNT(DISTINCT customer_name) FROM payments WHERE customer_name IS NOT NULL;")
-            customer_count = cursor.fetchone()[0]
             stats["unique_customers"] = customer_count
-            
-            cursor.execute("SELECT MIN(payment_date) FROM payments WHERE payment_date IS NOT NULL;")
-            min_date = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT MAX(payment_date) FROM payments WHERE payment_date IS NOT NULL;")
-            max_date = cursor.fetchone()[0]
-            
             stats["date_range"] = (min_date, max_date)
         
         conn.close()
@@ -3,13 +3,54 @@
 Final deployment verification with authentication support.
 """
 
-import requests
-import json
-import sqlite3
+import orjson
+import os
 from pathlib import Path
 import sys
 import time
 import base64
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.init_db import AMOUNT_KURUS_MISSING, has_amount_kurus
+from api.utils.database import open_db
+
+BASE_URL = "http://localhost:3000"
+
+# Same credential source and defaults as middleware.ts; encoded once
+AUTH_USERNAME = os.environ.get("AUTH_USERNAME", "innogy")
+AUTH_PASSWORD = os.environ.get("AUTH_PASSWORD", "tahsilat2025")
+AUTH_HEADER = {"Authorization": "Basic " + base64.b64encode(f"{AUTH_USERNAME}:{AUTH_PASSWORD}".encode()).decode()}
+
+# Overall budget for the HTTP phase (readiness probe and page/API checks), in seconds
+HTTP_PHASE_TIMEOUT = 15.0
+
+# Volume, date span and the currency/method distributions in one round trip
+DATA_PROFILE_SQL = """
+    WITH stats AS (
+        SELECT COUNT(*) AS n, MIN(payment_date) AS first_date, MAX(payment_date) AS last_date FROM payments
+    )
+    SELECT 'stats', first_date, last_date, n FROM stats
+    UNION ALL
+    SELECT 'currency', currency_paid, NULL, COUNT(*) FROM payments GROUP BY currency_paid
+    UNION ALL
+    SELECT 'method', payment_method, NULL, COUNT(*) FROM payments GROUP BY payment_method
+"""
+
+METHOD_CURRENCY_SUMMARY_SQL = """
+    SELECT 
+        payment_method,
+        currency_paid,
+        COUNT(*) as count,
+        SUM(amount_paid_kurus) / 100.0 as total,
+        AVG(amount_paid_kurus) / 100.0 as avg_amount
+    FROM payments 
+    GROUP BY payment_method, currency_paid
+    ORDER BY total DESC
+"""
 
 def get_db_path():
     base_dir = Path(__file__).parent.parent
@@ -17,18 +58,52 @@ def get_db_path():
 
 def get_auth_header():
     """Get Basic Auth header for testing."""
-    # Default credentials from middleware
-    username = "innogy"
-    password = "tahsilat2025"
-    credentials = base64.b64encode(f"{username}:{password}".encode()).decode()
-    return {"Authorization": f"Basic {credentials}"}
+    return AUTH_HEADER
+
+def create_session():
+    """Create a keep-alive HTTP session that sends the auth header on every request."""
+    # requests is only needed by the HTTP checks, so it is imported on first use
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    session.headers.update(get_auth_header())
+    session.headers["Connection"] = "keep-alive"
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        # Read timeouts are not retried; the request already used up its share of the deadline
+        max_retries=Retry(total=3, read=0, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def time_left(deadline):
+    """Per-request timeout for the time remaining before the deadline, never below 0.5s."""
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise TimeoutError(f"HTTP checks exceeded their {HTTP_PHASE_TIMEOUT:.0f}s deadline")
+    return max(0.5, left)
 
-def test_system_with_auth():
+def server_ready(deadline):
+    """Wait for the server with the shared readiness probe, within the HTTP phase deadline."""
+    import requests
+    from http_checks import READY_TIMEOUT, wait_ready
+    
+    # A plain session: the checks' session retries connection errors itself
+    with requests.Session() as session:
+        return wait_ready(session, BASE_URL, timeout=min(READY_TIMEOUT, deadline - time.monotonic()))
+
+def test_system_with_auth(deadline):
     """Test system with proper authentication."""
+    from http_checks import fetch_page
+    
     print("🔐 Testing system with authentication...")
     
-    base_url = "http://localhost:3000"
-    auth_headers = get_auth_header()
+    base_url = BASE_URL
+    session = create_session()
     
     try:
         # Test authenticated frontend pages
@@ -36,8 +111,12 @@ def test_system_with_auth():
         pages = ["/", "/monthly-summary", "/reports"]
         page_results = []
         
-        for page in pages:
-            response = requests.get(f"{base_url}{page}", headers=auth_headers, timeout=10)
+        # The page checks are independent, so fetch them concurrently over the
+        # pooled session; only the status is checked, so the HTML is not downloaded
+        with ThreadPoolExecutor(max_workers=len(pages)) as executor:
+            responses = list(executor.map(lambda page: fetch_page(session, f"{base_url}{page}", time_left(deadline)), pages))
+        
+        for page, response in zip(pages, responses):
             if response.status_code == 200:
                 print(f"✅ {page} - Accessible with auth")
                 page_results.append(True)
@@ -47,11 +126,11 @@ def test_system_with_auth():
         
         # Test critical API (no auth needed)
         print("📊 Testing Monthly Summary API...")
-        response = requests.get(f"{base_url}/api/reports/monthly-summary?year=2025&month=9", timeout=10)
+        response = session.get(f"{base_url}/api/reports/monthly-summary?year=2025&month=9", timeout=time_left(deadline))
         api_success = False
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             if data.get("success") and "data" in data:
                 mkm_total = data["data"]["mkm_summary"]["Genel Toplam"]["tl"]
                 msm_total = data["data"]["msm_summary"]["Genel Toplam"]["tl"] 
@@ -81,45 +160,35 @@ def test_system_with_auth():
     except Exception as e:
         print(f"❌ Error during authenticated testing: {str(e)}")
         return False
+        
+    finally:
+        session.close()
 
-def verify_large_data_readiness():
+def verify_large_data_readiness(conn):
     """Verify system is ready for large data import."""
     print("📊 Verifying large data readiness...")
     
-    db_path = get_db_path()
-    conn = sqlite3.connect(str(db_path))
+    if not has_amount_kurus(conn):
+        print(f"❌ {AMOUNT_KURUS_MISSING}")
+        return False
+    
     cursor = conn.cursor()
     
     try:
-        # Check current data volume
-        cursor.execute("SELECT COUNT(*) FROM payments")
-        current_count = cursor.fetchone()[0]
-        
-        # Check unique date span 
-        cursor.execute("SELECT MIN(payment_date), MAX(payment_date) FROM payments")
-        min_date, max_date = cursor.fetchone()
-        
-        # Check currency distribution
-        cursor.execute("SELECT currency_paid, COUNT(*) FROM payments GROUP BY currency_paid")
-        currencies = dict(cursor.fetchall())
-        
-        # Check payment methods
-        cursor.execute("SELECT payment_method, COUNT(*) FROM payments GROUP BY payment_method")
-        methods = dict(cursor.fetchall())
+        # Data volume, date span, currency and payment method distribution
+        currencies = {}
+        methods = {}
+        for kind, key, last_date, count in cursor.execute(DATA_PROFILE_SQL):
+            if kind == 'stats':
+                min_date, max_date, current_count = key, last_date, count
+            elif kind == 'currency':
+                currencies[key] = count
+            else:
+                methods[key] = count
         
         # Performance test with larger query
         start_time = time.time()
-        cursor.execute("""
-            SELECT 
-                payment_method,
-                currency_paid,
-                COUNT(*) as count,
-                SUM(amount_paid) as total,
-                AVG(amount_paid) as avg_amount
-            FROM payments 
-            GROUP BY payment_method, currency_paid
-            ORDER BY total DESC
-        """)
+        cursor.execute(METHOD_CURRENCY_SUMMARY_SQL)
         results = cursor.fetchall()
         query_time = time.time() - start_time
         
@@ -150,7 +219,7 @@ def verify_large_data_readiness():
         print(f"❌ Large data readiness check failed: {str(e)}")
         return False
     finally:
-        conn.close()
+        cursor.close()
 
 def main():
     print("🚀 FINAL DEPLOYMENT VERIFICATION")
@@ -162,11 +231,18 @@ def main():
     
     # Wait for server
     print("⏳ Waiting for server...")
-    time.sleep(2)
-    
-    # Run comprehensive tests
-    auth_test = test_system_with_auth()
-    capacity_test = verify_large_data_readiness()
+    deadline = time.monotonic() + HTTP_PHASE_TIMEOUT
+    if server_ready(deadline):
+        # Run comprehensive tests
+        auth_test = test_system_with_auth(deadline)
+    else:
+        print("❌ Server did not respond, skipping the HTTP checks")
+        auth_test = False
+    conn = open_db(get_db_path())
+    try:
+        capacity_test = verify_large_data_readiness(conn)
+    finally:
+        conn.close()
     
     print("\n" + "=" * 50)
     
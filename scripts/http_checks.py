@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+HTTP helpers shared by the deployment check scripts.
+"""
+
+import random
+import time
+
+import requests
+
+# Longest wait for the dev server to start answering, in seconds
+READY_TIMEOUT = 5
+
+# Readiness polling backs off exponentially from this delay, up to the cap
+READY_BASE_DELAY = 0.05
+READY_MAX_DELAY = 1.0
+
+def wait_ready(session, url, timeout=READY_TIMEOUT):
+    """
+    Poll url with HEAD until the server answers below 500, for at most timeout seconds.
+    
+    Retries back off exponentially with full jitter, so a server that is still
+    starting is not hammered while one that is already up answers the first probe.
+    """
+    end = time.monotonic() + timeout
+    attempt = 0
+    while True:
+        left = end - time.monotonic()
+        if left <= 0:
+            return False
+        try:
+            # A 401 from the auth middleware still means the server is up
+            if session.head(url, timeout=min(1.0, left)).status_code < 500:
+                return True
+        except requests.RequestException:
+            pass
+        delay = random.uniform(0, min(READY_MAX_DELAY, READY_BASE_DELAY * 2 ** attempt))
+        time.sleep(max(0.0, min(delay, end - time.monotonic())))
+        attempt += 1
+
+def fetch_page(session, url, timeout):
+    """
+    Check a page with HEAD, falling back to a streamed GET whose body is never read.
+    
+    Page checks only look at the status, so the rendered HTML is not downloaded.
+    """
+    response = session.head(url, timeout=timeout, allow_redirects=True)
+    if response.status_code in (405, 501):
+        response = session.get(url, timeout=timeout, stream=True)
+        response.close()
+    return response
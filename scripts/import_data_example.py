@@ -10,7 +10,6 @@ Usage:
 import sys
 import os
 import sqlite3
-import pandas as pd
 from pathlib import Path
 from datetime import datetime
 import json
@@ -19,118 +18,172 @@ import json
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-def parse_turkish_date(date_value):
-    """Parse Turkish date formats and Excel serial dates."""
-    if pd.isna(date_value) or not date_value:
-        return None
+from api.init_db import migrate_amount_kurus
+
+# Excel serial day 0 (serials count from 1899-12-30 because of the 1900 leap year bug)
+EXCEL_EPOCH = '1899-12-30'
+
+# Source column holding the paid amount
+AMOUNT_COLUMN = 'Ödenen Tutar(Σ:12,438,088.23)'
+
+# Text columns copied into each record: (record field, source column, transform)
+TEXT_COLUMNS = [
+    ('customer_name', 'Müşteri Adı Soyadı', None),
+    ('currency_paid', 'Ödenen Döviz', 'upper'),
+    ('project_name', 'Proje Adı', None),
+    ('payment_method', 'Tahsilat Şekli', None),
+    ('sales_person', 'Satış Personeli', None),
+    ('activity_no', 'Aktivite No(87)', None),
+]
+
+# Value for empty cells and missing columns; other text fields default to ''
+TEXT_DEFAULTS = {'currency_paid': 'TRY'}
+
+# Payments columns written by the import, in INSERT order
+INSERT_COLUMNS = [
+    'customer_name', 'payment_date', 'year', 'month', 'amount_paid',
+    'amount_paid_kurus', 'currency_paid', 'project_name', 'payment_method', 'sales_person',
+    'activity_no', 'status', 'amount_due', 'currency_due', 'exchange_rate',
+    'is_deposit', 'description', 'property_units', 'account_name',
+    'account_description', 'check_due_date', 'agency_name',
+]
+
+# Values for the columns the Excel export does not provide
+CONSTANT_COLUMNS = {
+    'status': 'Completed',
+    'amount_due': 0,
+    'currency_due': 'TRY',
+    'exchange_rate': 1.0,
+    'is_deposit': 0,
+    'description': '',
+    'property_units': '',
+    'account_name': '',
+    'account_description': '',
+    'check_due_date': None,
+    'agency_name': '',
+}
+
+# Every source column the import reads
+SOURCE_COLUMNS = {'Tarih', AMOUNT_COLUMN} | {column for _, column, _ in TEXT_COLUMNS}
+
+# pandas is imported inside the functions that need it, so the usage and
+# missing-file paths return without paying for the import
+
+def parse_turkish_dates(values):
+    """
+    Parse a column of Turkish dates, Excel serial dates and timestamps.
+    Returns a datetime64 Series with NaT where a value could not be parsed.
+    """
+    import numpy as np
+    import pandas as pd
     
-    try:
-        # If it's already a datetime object
-        if isinstance(date_value, pd.Timestamp):
-            return date_value.strftime('%Y-%m-%d')
-        
-        # If it's a number (Excel serial date)
-        if isinstance(date_value, (int, float)):
-            # Excel epoch starts from 1900-01-01 but has a leap year bug
-            excel_epoch = pd.Timestamp('1900-01-01')
-            days_offset = int(date_value) - 2  # Adjust for Excel leap year bug
-            date_obj = excel_epoch + pd.Timedelta(days=days_offset)
-            return date_obj.strftime('%Y-%m-%d')
-        
-        # If it's a string, try to parse DD/MM/YYYY format
-        date_str = str(date_value).strip()
-        if '/' in date_str:
-            parts = date_str.split('/')
-            if len(parts) == 3:
-                day, month, year = parts
-                return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-        
-        # Try pandas parsing as fallback
-        parsed = pd.to_datetime(date_value, dayfirst=True)
-        return parsed.strftime('%Y-%m-%d')
-        
-    except Exception as e:
-        print(f"Warning: Could not parse date '{date_value}': {e}")
-        return None
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.normalize()
+    # Serials are truncated to their day, as int() did: the fraction is the
+    # time of day, so rounding would move afternoon payments to the next day
+    if pd.api.types.is_numeric_dtype(values):
+        serials = values.where(values > 0)
+        return pd.to_datetime(np.floor(serials), unit='D', origin=EXCEL_EPOCH, errors='coerce')
+    
+    dates = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    kinds = values.map(type)
+    
+    # Cells openpyxl already returned as datetimes
+    is_timestamp = kinds.isin([pd.Timestamp, datetime])
+    if is_timestamp.any():
+        dates[is_timestamp] = pd.to_datetime(values[is_timestamp]).dt.normalize()
+    
+    # Excel serial numbers
+    is_number = kinds.isin([int, float])
+    if is_number.any():
+        serials = pd.to_numeric(values[is_number], errors='coerce')
+        dates[is_number] = pd.to_datetime(
+            np.floor(serials.where(serials > 0)), unit='D', origin=EXCEL_EPOCH, errors='coerce'
+        )
+    
+    # Text: DD/MM/YYYY first, then any day-first format
+    is_text = kinds.eq(str)
+    if is_text.any():
+        text = values[is_text].str.strip()
+        parsed = pd.to_datetime(text, format='%d/%m/%Y', errors='coerce')
+        pending = parsed.isna() & text.ne('')
+        if pending.any():
+            parsed[pending] = pd.to_datetime(text[pending], format='mixed', dayfirst=True, errors='coerce')
+        dates[is_text] = parsed
+    
+    return dates
 
-def parse_turkish_amount(amount_value):
-    """Parse Turkish number format (1.234,56) to decimal."""
-    if pd.isna(amount_value) or not amount_value:
-        return 0.0
+def parse_turkish_amounts(values):
+    """Parse a column of Turkish formatted amounts (1.234,56) to floats, 0.0 where invalid."""
+    import pandas as pd
     
-    try:
-        if isinstance(amount_value, (int, float)):
-            return float(amount_value)
-        
-        # Remove currency symbols and spaces
-        amount_str = str(amount_value).strip()
-        amount_str = ''.join(c for c in amount_str if c.isdigit() or c in '.,')
-        
-        # Handle Turkish format: 1.234,56 -> 1234.56
-        if ',' in amount_str and '.' in amount_str:
-            amount_str = amount_str.replace('.', '').replace(',', '.')
-        elif ',' in amount_str:
-            amount_str = amount_str.replace(',', '.')
-        
-        return float(amount_str) if amount_str else 0.0
-        
-    except Exception as e:
-        print(f"Warning: Could not parse amount '{amount_value}': {e}")
-        return 0.0
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype('float64').fillna(0.0)
+    
+    # Numbers pass through; text keeps only digits and separators
+    numbers = pd.to_numeric(values.where(values.map(type).ne(str)), errors='coerce')
+    text = values.where(values.map(type).eq(str)).str.replace(r'[^\d.,]', '', regex=True)
+    
+    has_comma = text.str.contains(',', regex=False, na=False)
+    has_dot = text.str.contains('.', regex=False, na=False)
+    # Handle Turkish format: 1.234,56 -> 1234.56
+    text = text.where(~(has_comma & has_dot), text.str.replace('.', '', regex=False))
+    text = text.str.replace(',', '.', regex=False)
+    
+    amounts = numbers.fillna(pd.to_numeric(text, errors='coerce'))
+    return amounts.astype('float64').fillna(0.0)
 
 def process_excel_file(excel_path):
-    """Process an Excel file and extract payment data."""
+    """
+    Process an Excel file and extract payment data.
+    Returns a DataFrame whose columns follow INSERT_COLUMNS, plus the row errors.
+    """
+    import pandas as pd
+    
     print(f"Processing Excel file: {excel_path}")
     
     try:
-        # Read Excel file with Turkish date handling
-        df = pd.read_excel(excel_path, parse_dates=['Tarih'] if 'Tarih' in pd.read_excel(excel_path, nrows=0).columns else None)
+        # Dates are parsed column-wise below, so the file is read once, and only
+        # the columns the import uses are converted into the frame
+        df = pd.read_excel(excel_path, engine='openpyxl', usecols=lambda column: column in SOURCE_COLUMNS)
         
         print(f"Found {len(df)} rows in Excel file")
-        print(f"Columns: {list(df.columns)}")
+        print(f"Columns used: {list(df.columns)}")
         
         # Check for required column
         if 'Tarih' not in df.columns:
             raise ValueError("Required 'Tarih' column not found in Excel file")
         
-        processed_data = []
-        errors = []
+        dates = parse_turkish_dates(df['Tarih'])
+        valid = dates.notna()
+        errors = [f"Row {index + 1}: Invalid date" for index in df.index[~valid]]
         
-        for index, row in df.iterrows():
-            try:
-                # Parse payment date
-                payment_date = parse_turkish_date(row.get('Tarih'))
-                if not payment_date:
-                    errors.append(f"Row {index + 1}: Invalid date")
-                    continue
-                
-                # Extract year and month
-                date_obj = datetime.strptime(payment_date, '%Y-%m-%d')
-                year = date_obj.year
-                month = date_obj.month
-                
-                # Parse amount
-                amount_paid = parse_turkish_amount(row.get('Ödenen Tutar(Σ:12,438,088.23)', 0))
-                
-                # Create processed record
-                record = {
-                    'customer_name': str(row.get('Müşteri Adı Soyadı', '')).strip(),
-                    'payment_date': payment_date,
-                    'year': year,
-                    'month': month,
-                    'amount_paid': amount_paid,
-                    'currency_paid': str(row.get('Ödenen Döviz', 'TRY')).strip().upper(),
-                    'project_name': str(row.get('Proje Adı', '')).strip(),
-                    'payment_method': str(row.get('Tahsilat Şekli', '')).strip(),
-                    'sales_person': str(row.get('Satış Personeli', '')).strip(),
-                    'activity_no': str(row.get('Aktivite No(87)', '')).strip(),
-                    'status': 'Completed'
-                }
-                
-                processed_data.append(record)
-                
-            except Exception as e:
-                errors.append(f"Row {index + 1}: {str(e)}")
+        df = df[valid]
+        dates = dates[valid]
+        
+        out = pd.DataFrame({
+            'payment_date': dates.dt.strftime('%Y-%m-%d'),
+            'year': dates.dt.year,
+            'month': dates.dt.month,
+        })
+        if AMOUNT_COLUMN in df.columns:
+            out['amount_paid'] = parse_turkish_amounts(df[AMOUNT_COLUMN])
+        else:
+            out['amount_paid'] = 0.0
+        # Exact integer kuruş, written directly so the fill-in trigger never fires here
+        out['amount_paid_kurus'] = (out['amount_paid'] * 100).round().astype('int64')
+        # One vectorized clean-up pass per column
+        for field, column, transform in TEXT_COLUMNS:
+            default = TEXT_DEFAULTS.get(field, '')
+            if column not in df.columns:
+                out[field] = default
+                continue
+            text = df[column].fillna(default).astype(str).str.strip()
+            out[field] = text.str.upper() if transform == 'upper' else text
+        for column, value in CONSTANT_COLUMNS.items():
+            out[column] = value
+        
+        processed_data = out[INSERT_COLUMNS]
         
         print(f"Successfully processed {len(processed_data)} records")
         if errors:
@@ -144,10 +197,51 @@ def process_excel_file(excel_path):
         
     except Exception as e:
         print(f"Error processing Excel file: {e}")
-        return [], [str(e)]
+        return pd.DataFrame(columns=INSERT_COLUMNS), [str(e)]
+
+# Rows written per transaction; a failing chunk is rolled back and retried row by row
+INSERT_CHUNK_SIZE = 5000
+
+# Bulk-load tuning for the import connection. journal_mode=WAL is stored in the
+# database file, so it persists for every later connection; the others apply
+# to this connection only. EXCLUSIVE locking is avoided so a running API can
+# keep reading during the import.
+BULK_LOAD_PRAGMAS = [
+    "PRAGMA journal_mode = WAL;",
+    "PRAGMA synchronous = NORMAL;",  # No fsync per commit in WAL mode
+    "PRAGMA temp_store = MEMORY;",
+    "PRAGMA cache_size = -64000;",  # 64MB cache
+]
+
+INSERT_PAYMENT_SQL = f"""
+    INSERT INTO payments ({', '.join(INSERT_COLUMNS)})
+    VALUES ({', '.join('?' for _ in INSERT_COLUMNS)})
+"""
+
+def insert_chunk(cursor, rows):
+    """Insert one chunk in its own transaction, falling back to row-by-row inserts."""
+    try:
+        cursor.execute("BEGIN")
+        cursor.executemany(INSERT_PAYMENT_SQL, rows)
+        cursor.execute("COMMIT")
+        return len(rows)
+    except sqlite3.Error:
+        cursor.execute("ROLLBACK")
+    
+    # Retry individually so one bad row only skips itself
+    inserted_count = 0
+    cursor.execute("BEGIN")
+    for row in rows:
+        try:
+            cursor.execute(INSERT_PAYMENT_SQL, row)
+            inserted_count += 1
+        except sqlite3.Error as e:
+            print(f"Error inserting record: {e}")
+    cursor.execute("COMMIT")
+    return inserted_count
 
 def insert_into_database(processed_data):
-    """Insert processed data into the SQLite database."""
+    """Insert a processed DataFrame (columns in INSERT_COLUMNS order) into the SQLite database."""
     db_path = project_root / "tahsilat_data.db"
     
     if not db_path.exists():
@@ -155,34 +249,25 @@ def insert_into_database(processed_data):
         return False
     
     try:
-        conn = sqlite3.connect(str(db_path))
+        # Autocommit mode: transactions are opened explicitly per chunk
+        conn = sqlite3.connect(str(db_path), isolation_level=None)
         cursor = conn.cursor()
+        for pragma in BULK_LOAD_PRAGMAS:
+            cursor.execute(pragma)
+        migrate_amount_kurus(conn)
         
         inserted_count = 0
         
-        for record in processed_data:
-            try:
-                cursor.execute('''
-                    INSERT INTO payments (
-                        customer_name, payment_date, year, month, amount_paid,
-                        currency_paid, project_name, payment_method, sales_person,
-                        activity_no, status, amount_due, currency_due, exchange_rate,
-                        is_deposit, description, property_units, account_name,
-                        account_description, check_due_date, agency_name
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    record['customer_name'], record['payment_date'], record['year'], 
-                    record['month'], record['amount_paid'], record['currency_paid'],
-                    record['project_name'], record['payment_method'], record['sales_person'],
-                    record['activity_no'], record['status'], 0, 'TRY', 1.0, 0,
-                    '', '', '', '', None, ''
-                ))
-                inserted_count += 1
-                
-            except Exception as e:
-                print(f"Error inserting record: {e}")
+        # itertuples yields plain row tuples straight from the column arrays
+        for offset in range(0, len(processed_data), INSERT_CHUNK_SIZE):
+            chunk = processed_data.iloc[offset:offset + INSERT_CHUNK_SIZE]
+            inserted_count += insert_chunk(cursor, list(chunk.itertuples(index=False, name=None)))
         
-        conn.commit()
+        # Refresh the planner statistics for the new rows, then fold the load
+        # back into the main file and reset the WAL
+        cursor.execute("ANALYZE payments;")
+        cursor.execute("PRAGMA optimize;")
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE);")
         conn.close()
         
         print(f"Successfully inserted {inserted_count} records into database")
@@ -212,13 +297,13 @@ def main():
     # Process the Excel file
     processed_data, errors = process_excel_file(excel_file)
     
-    if not processed_data:
+    if processed_data.empty:
         print("No data to import. Check errors above.")
         return
     
     # Show sample of processed data
     print(f"\nSample of processed data (first 3 records):")
-    for i, record in enumerate(processed_data[:3]):
+    for i, record in enumerate(processed_data.head(3).to_dict(orient='records')):
         print(f"Record {i + 1}:")
         print(f"  Customer: {record['customer_name']}")
         print(f"  Date: {record['payment_date']}")
@@ -4,11 +4,18 @@ Database optimization script for handling large datasets (1 year+ of payments).
 Adds indexes and performance optimizations.
 """
 
+import re
 import sqlite3
 import sys
 import os
 from pathlib import Path
 
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.init_db import migrate_amount_kurus
+
 def get_db_path():
     """Get the absolute path to the SQLite database."""
     base_dir = Path(__file__).parent.parent
@@ -29,17 +36,18 @@ def optimize_database():
     cursor = conn.cursor()
     
     try:
+        # The covering indexes below include the integer kuruş amount
+        migrate_amount_kurus(conn)
+        
         # Add performance indexes for common queries
         optimization_queries = [
-            # Date-based queries (most common)
-            "CREATE INDEX IF NOT EXISTS idx_payment_date ON payments(payment_date);",
-            "CREATE INDEX IF NOT EXISTS idx_year_month ON payments(year, month);",
-            
-            # Payment method queries
-            "CREATE INDEX IF NOT EXISTS idx_payment_method ON payments(payment_method);",
+            # Single-column indexes that a composite below leads with only slow down writes
+            "DROP INDEX IF EXISTS idx_payment_date;",  # idx_date_method
+            "DROP INDEX IF EXISTS idx_year_month;",  # idx_year_month_method
+            "DROP INDEX IF EXISTS idx_payment_method;",  # idx_method_currency_kurus
+            "DROP INDEX IF EXISTS idx_account_name;",  # idx_account_method
             
-            # Account and customer queries
-            "CREATE INDEX IF NOT EXISTS idx_account_name ON payments(account_name);",
+            # Customer queries
             "CREATE INDEX IF NOT EXISTS idx_customer_name ON payments(customer_name);",
             
             # Currency and amount queries
@@ -54,12 +62,18 @@ def optimize_database():
             "CREATE INDEX IF NOT EXISTS idx_year_month_method ON payments(year, month, payment_method);",
             "CREATE INDEX IF NOT EXISTS idx_account_method ON payments(account_name, payment_method);",
             
+            # Covering indexes: method/currency summaries sum integer kuruş straight from the index in group order
+            "DROP INDEX IF EXISTS idx_method_currency_amount;",
+            "DROP INDEX IF EXISTS idx_year_month_method_currency_amount;",
+            "CREATE INDEX IF NOT EXISTS idx_method_currency_kurus ON payments(payment_method, currency_paid, amount_paid_kurus);",
+            "CREATE INDEX IF NOT EXISTS idx_year_month_method_currency_kurus ON payments(year, month, payment_method, currency_paid, amount_paid_kurus);",
+            
             # Status and activity queries
             "CREATE INDEX IF NOT EXISTS idx_status ON payments(status);",
             "CREATE INDEX IF NOT EXISTS idx_activity_no ON payments(activity_no);",
         ]
         
-        print("Creating performance indexes...")
+        print("Updating performance indexes...")
         for query in optimization_queries:
             print(f"Executing: {query}")
             cursor.execute(query)
@@ -70,6 +84,9 @@ def optimize_database():
         
         # Set pragmas for better performance
         performance_pragmas = [
+            "PRAGMA journal_mode = WAL;",  # Persistent: readers no longer block the importer
+            "PRAGMA wal_autocheckpoint = 1000;",  # Checkpoint every ~1000 pages so the WAL stays small
+            "PRAGMA busy_timeout = 5000;",  # Wait for locks instead of failing immediately
             "PRAGMA cache_size = -64000;",  # 64MB cache
             "PRAGMA temp_store = MEMORY;",  # Store temp data in memory
             "PRAGMA mmap_size = 268435456;",  # 256MB memory map
@@ -81,6 +98,9 @@ def optimize_database():
             print(f"Executing: {pragma}")
             cursor.execute(pragma)
         
+        cursor.execute("PRAGMA journal_mode;")
+        journal_mode = cursor.fetchone()[0]
+        
         # Get database statistics
         cursor.execute("SELECT COUNT(*) as payment_count FROM payments;")
         payment_count = cursor.fetchone()[0]
@@ -96,9 +116,12 @@ def optimize_database():
         print(f"   - Total payments: {payment_count:,}")
         print(f"   - Total indexes: {index_count}")
         print(f"   - Database size: {db_size_mb:.2f} MB")
+        print(f"   - Journal mode: {journal_mode}")
         print(f"   - Estimated capacity: ~{payment_count * 10:,} payments (with current structure)")
         
         conn.commit()
+        # Fold the index builds into the main file and reset the WAL before closing
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE);")
         return True
         
     except Exception as e:
@@ -109,6 +132,41 @@ def optimize_database():
     finally:
         conn.close()
 
+# Queries the API and deploy checks rely on; their plans must stay index-driven
+CANONICAL_QUERIES = [
+    "SELECT COUNT(*) FROM payments WHERE payment_date BETWEEN '01/09/2025' AND '30/09/2025';",
+    "SELECT * FROM payments WHERE payment_method = 'Check' AND year = 2025;",
+    "SELECT account_name, SUM(amount_paid) FROM payments WHERE currency_paid = 'TL' GROUP BY account_name;",
+    "SELECT payment_method, currency_paid, COUNT(*), SUM(amount_paid_kurus), AVG(amount_paid_kurus) FROM payments GROUP BY payment_method, currency_paid;",
+    "SELECT payment_method, currency_paid, SUM(amount_paid_kurus) FROM payments WHERE year = 2025 AND month = 9 GROUP BY payment_method, currency_paid;",
+    # Deploy check summary; ordering the grouped result by its total is expected
+    "SELECT payment_method, currency_paid, COUNT(*), SUM(amount_paid_kurus) / 100.0 AS total FROM payments GROUP BY payment_method, currency_paid ORDER BY total DESC;",
+]
+
+# A bare table scan, i.e. one that uses no index at all ("SCAN TABLE" before SQLite 3.36)
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?payments$")
+
+def find_plan_issues(plan):
+    """
+    Flag steps in an EXPLAIN QUERY PLAN that the indexes should make unnecessary.
+    
+    Any scan of payments that uses no index is reported, as is any temp B-tree
+    for GROUP BY, since grouping must walk an index in group order. A temp
+    B-tree for ORDER BY is only accepted at the top level, where it sorts the
+    (small) aggregated result; inside a subquery it orders rows that a GROUP BY
+    or aggregate then discards the order of, so the inner ORDER BY should be
+    removed.
+    """
+    issues = []
+    for _, parent, _, detail in plan:
+        if FULL_SCAN.match(detail):
+            issues.append(f"Full table scan: {detail}")
+        elif "USE TEMP B-TREE FOR GROUP BY" in detail:
+            issues.append(f"Unnecessary sort: {detail}")
+        elif "USE TEMP B-TREE FOR ORDER BY" in detail and parent != 0:
+            issues.append(f"Unnecessary sort: {detail} (inside a subquery)")
+    return issues
+
 def verify_indexes():
     """Verify that all indexes were created successfully."""
     db_path = get_db_path()
@@ -124,21 +182,20 @@ def verify_indexes():
             print(f"   - {idx}")
             
         # Check query performance with EXPLAIN QUERY PLAN
-        test_queries = [
-            "SELECT COUNT(*) FROM payments WHERE payment_date BETWEEN '01/09/2025' AND '30/09/2025';",
-            "SELECT * FROM payments WHERE payment_method = 'Check' AND year = 2025;",
-            "SELECT account_name, SUM(amount_paid) FROM payments WHERE currency_paid = 'TL' GROUP BY account_name;",
-        ]
-        
         print(f"\n🔍 Query execution plans:")
-        for query in test_queries:
-            cursor.execute(f"EXPLAIN QUERY PLAN {query}")
-            plan = cursor.fetchall()
+        flagged = 0
+        for query in CANONICAL_QUERIES:
+            plan = cursor.execute("EXPLAIN QUERY PLAN " + query).fetchall()
             print(f"\nQuery: {query}")
             for step in plan:
                 print(f"   Plan: {step}")
-                
-        return True
+            for issue in find_plan_issues(plan):
+                print(f"   ⚠️  {issue}")
+                flagged += 1
+        
+        if flagged:
+            print(f"\n❌ {flagged} query plan regression(s) found")
+        return flagged == 0
         
     except Exception as e:
         print(f"❌ Error verifying indexes: {str(e)}")
@@ -151,7 +208,8 @@ if __name__ == "__main__":
     print("🚀 Starting database optimization for large dataset handling...")
     
     if optimize_database():
-        verify_indexes()
+        if not verify_indexes():
+            sys.exit(1)
         print(f"\n✅ Database is ready for large dataset import!")
         print(f"💡 Recommended: Test with a subset of data first")
     else:
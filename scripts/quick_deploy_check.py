@@ -4,11 +4,27 @@ Quick pre-deployment verification focused on critical functionality.
 """
 
 import requests
-import json
-import sqlite3
+from requests.adapters import HTTPAdapter
+import orjson
 from pathlib import Path
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.init_db import AMOUNT_KURUS_MISSING, has_amount_kurus
+from api.utils.database import open_db
+from http_checks import READY_TIMEOUT, fetch_page, wait_ready
+
+# Per-request timeout; connection setup is amortized by the pooled session
+REQUEST_TIMEOUT = 5
+
+# One keep-alive session for every probe, sized for the concurrent fan-out
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=0))
 
 def get_db_path():
     base_dir = Path(__file__).parent.parent
@@ -19,14 +35,22 @@ def test_critical_apis():
     print("🔍 Testing critical APIs...")
     
     base_url = "http://localhost:3000"
+    pages = ["/", "/monthly-summary", "/reports"]
     critical_tests = []
     
     try:
+        # The API and page checks are independent, so fetch them all at once
+        # and evaluate the responses in order; pages only need their status
+        with ThreadPoolExecutor(max_workers=len(pages) + 1) as executor:
+            summary_future = executor.submit(SESSION.get, f"{base_url}/api/reports/monthly-summary?year=2025&month=9", timeout=REQUEST_TIMEOUT)
+            page_responses = list(executor.map(lambda page: fetch_page(SESSION, f"{base_url}{page}", REQUEST_TIMEOUT), pages))
+            summary_response = summary_future.result()
+        
         # Test 1: Monthly Summary (most important)
         print("📊 Testing Monthly Summary API...")
-        response = requests.get(f"{base_url}/api/reports/monthly-summary?year=2025&month=9", timeout=10)
+        response = summary_response
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             if data.get("success") and "data" in data:
                 mkm_total = data["data"]["mkm_summary"]["Genel Toplam"]["tl"]
                 msm_total = data["data"]["msm_summary"]["Genel Toplam"]["tl"] 
@@ -51,11 +75,9 @@ def test_critical_apis():
             
         # Test 2: Frontend Pages
         print("🌐 Testing critical frontend pages...")
-        pages = ["/", "/monthly-summary", "/reports"]
         page_results = []
         
-        for page in pages:
-            response = requests.get(f"{base_url}{page}", timeout=10)
+        for page, response in zip(pages, page_responses):
             if response.status_code == 200:
                 print(f"✅ {page} - Accessible")
                 page_results.append(True)
@@ -68,11 +90,16 @@ def test_critical_apis():
         # Test 3: Database Performance
         print("⚡ Testing database performance...")
         db_path = get_db_path()
-        conn = sqlite3.connect(str(db_path))
+        conn = open_db(db_path)
+        if not has_amount_kurus(conn):
+            conn.close()
+            print(f"❌ {AMOUNT_KURUS_MISSING}")
+            return False
         cursor = conn.cursor()
         
         start_time = time.time()
-        cursor.execute("SELECT COUNT(*), SUM(amount_paid) FROM payments WHERE payment_date LIKE '%/09/2025'")
+        # year/month are indexed; a leading-wildcard LIKE on payment_date forces a full scan
+        cursor.execute("SELECT COUNT(*), SUM(amount_paid_kurus) / 100.0 FROM payments WHERE year = 2025 AND month = 9")
         result = cursor.fetchone()
         query_time = time.time() - start_time
         
@@ -96,15 +123,20 @@ def check_data_readiness():
     print("📋 Checking data structure readiness...")
     
     db_path = get_db_path()
-    conn = sqlite3.connect(str(db_path))
+    conn = open_db(db_path)
     cursor = conn.cursor()
     
     try:
+        # The kuruş covering index below needs the column first
+        if not has_amount_kurus(conn):
+            print(f"❌ {AMOUNT_KURUS_MISSING}")
+            return False
+        
         # Check indexes exist
         cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='payments'")
         indexes = [row[0] for row in cursor.fetchall()]
         
-        required_indexes = ['idx_payment_date', 'idx_payment_method', 'idx_year_month']
+        required_indexes = ['idx_date_method', 'idx_method_currency_kurus', 'idx_year_month_method']
         missing_indexes = [idx for idx in required_indexes if idx not in indexes]
         
         if missing_indexes:
@@ -135,7 +167,8 @@ def main():
     
     # Wait for server
     print("⏳ Waiting for server to be ready...")
-    time.sleep(2)
+    if not wait_ready(SESSION, "http://localhost:3000/"):
+        print(f"⚠️  Server not ready after {READY_TIMEOUT}s, running checks anyway")
     
     # Run tests
     api_test = test_critical_apis()
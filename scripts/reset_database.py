@@ -22,7 +22,7 @@ IMPORTANT: This script will delete ALL data in the database!
 import os
 import sys
 import sqlite3
-import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -32,6 +32,7 @@ sys.path.insert(0, str(project_root))
 
 # Import database initialization function
 from api.init_db import init_database
+from api.utils.database import open_db
 
 def backup_database():
     """Create a backup of the current database before resetting."""
@@ -49,22 +50,33 @@ def backup_database():
     timestamp = datetime.utcnow().strftime('%Y-%m-%dT%H-%M-%S-%fZ')
     backup_file = backups_dir / f"tahsilat_data_backup_{timestamp}.db"
     
-    # Copy the database file to the backup location
-    shutil.copy2(db_path, backup_file)
+    # VACUUM INTO writes a consistent snapshot, including changes still in
+    # the WAL, and rebuilds it without free pages so the backup is compact
+    source = open_db(db_path)
+    try:
+        source.execute("VACUUM INTO ?;", (str(backup_file),))
+    finally:
+        source.close()
     print(f"Database backup created: {backup_file}")
     return str(backup_file)
 
-def delete_all_data():
-    """Delete all data from tables while preserving the schema."""
+def delete_all_data(backup=None):
+    """
+    Delete all data from tables while preserving the schema.
+    
+    backup is an optional future for a backup running in the background; the
+    delete script is prepared meanwhile and only run once the backup is done.
+    """
     db_path = project_root / "tahsilat_data.db"
     
     if not db_path.exists():
         print("Database file doesn't exist. Nothing to delete.")
         return False
     
+    conn = None
     try:
         # Connect to the database
-        conn = sqlite3.connect(str(db_path))
+        conn = open_db(db_path)
         cursor = conn.cursor()
         
         # Known tables in our schema
@@ -75,9 +87,21 @@ def delete_all_data():
             "payment_channels"  # Payment channel types
         ]
         
-        # Get a list of all tables in the database to handle any that might be added later
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = [table[0] for table in cursor.fetchall() if not table[0].startswith('sqlite_')]
+        # Get a list of all tables in the database to handle any that might be added later.
+        # Virtual tables (the payments_fts search index) and their shadow tables
+        # are SQLite internals: deleting from them directly corrupts the index.
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%';")
+        schema = cursor.fetchall()
+        virtual_tables = [name for name, sql in schema if sql.upper().startswith('CREATE VIRTUAL TABLE')]
+        # Shadow tables are named after their virtual table, e.g. payments_fts_data
+        shadow_prefixes = tuple(f"{name}_" for name in virtual_tables)
+        tables = [
+            name for name, _ in schema
+            if name not in virtual_tables and not name.startswith(shadow_prefixes)
+        ]
+        
+        # FTS5 indexes are emptied through their own 'delete-all' command instead
+        fts_tables = [name for name, sql in schema if name in virtual_tables and 'USING FTS5' in sql.upper()]
         
         # Make sure we've accounted for all tables
         for table in tables:
@@ -86,30 +110,92 @@ def delete_all_data():
                 known_tables.append(table)
         
         # Delete all data from each table
+        statements = []
+        present_tables = []
         for table_name in known_tables:
             if table_name in tables:
                 print(f"Deleting all data from table: {table_name}")
-                cursor.execute(f"DELETE FROM {table_name};")
+                statements.append(f'DELETE FROM "{table_name}";')
+                present_tables.append(table_name)
             else:
                 print(f"Table {table_name} doesn't exist in the database, skipping.")
         
-        # Reset the auto-increment counters for all tables
-        for table_name in known_tables:
-            if table_name in tables:
-                try:
-                    cursor.execute(f"DELETE FROM sqlite_sequence WHERE name='{table_name}';")
-                except:
-                    print(f"Note: Could not reset auto-increment for {table_name}, continuing...")
+        # Capture the explicit indexes on the cleared tables so the rows can be
+        # deleted without maintaining them; automatic indexes have no SQL and
+        # cannot be dropped
+        placeholders = ", ".join("?" for _ in present_tables)
+        cursor.execute(
+            f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders});",
+            present_tables,
+        )
+        indexes = cursor.fetchall()
+        
+        # Reset the auto-increment counters for all tables (sqlite_sequence only
+        # exists once an AUTOINCREMENT table has been created)
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence';")
+        reset_sequences = cursor.fetchone() is not None and present_tables
+        if not reset_sequences:
+            print("Note: No auto-increment counters to reset, continuing...")
+        
+        # Never delete before the backup has been written
+        if backup is not None:
+            backup.result()
         
-        # Commit the changes and close the connection
-        conn.commit()
+        # Run every deletion as one write transaction: a single commit, and
+        # nothing is applied unless all of it succeeds. Table names cannot be
+        # bound, so the data deletes and FTS5 index resets go in as one script,
+        # between dropping the indexes and recreating them on the now empty
+        # tables; the counter resets bind the names to a single prepared statement.
+        cursor.executescript("\n".join(
+            ["BEGIN IMMEDIATE;"]
+            + [f'DROP INDEX "{name}";' for name, _ in indexes]
+            + statements
+            + [f'INSERT INTO "{name}" ("{name}") VALUES (\'delete-all\');' for name in fts_tables]
+            + [f"{sql};" for _, sql in indexes]
+        ))
+        if reset_sequences:
+            cursor.executemany("DELETE FROM sqlite_sequence WHERE name = ?;", [(table_name,) for table_name in present_tables])
+        cursor.execute("COMMIT;")
         conn.close()
         print("All data deleted from the database.")
         return True
     except Exception as e:
         print(f"Error deleting data: {e}")
+        # Closing without a commit rolls back a partially applied script
+        if conn is not None:
+            conn.close()
         return False
 
+def check_payment_insert(conn):
+    """
+    Insert a placeholder payment inside a transaction that is rolled back.
+    
+    The insert fires every trigger on payments, so a damaged search index or
+    roll-up shows up here. Returns None when the insert works, otherwise the error.
+    """
+    required = [
+        name for name, notnull, default, pk in conn.execute(
+            "SELECT name, \"notnull\", dflt_value, pk FROM pragma_table_info('payments');"
+        )
+        if notnull and default is None and not pk
+    ]
+    if required:
+        columns = ", ".join(f'"{name}"' for name in required)
+        placeholders = ", ".join("?" for _ in required)
+        statement = f"INSERT INTO payments ({columns}) VALUES ({placeholders});"
+    else:
+        statement = "INSERT INTO payments DEFAULT VALUES;"
+    
+    conn.execute("BEGIN;")
+    try:
+        # SQLite does not enforce column types, so 0 satisfies every NOT NULL column
+        conn.execute(statement, [0] * len(required))
+        return None
+    except sqlite3.Error as e:
+        return e
+    finally:
+        conn.execute("ROLLBACK;")
+
 def main():
     """Reset the database by backing up, deleting all data, and reinitializing."""
     print("\n===== Tahsilat Raporu Database Reset =====\n")
@@ -126,13 +212,19 @@ def main():
         print("Database reset cancelled.")
         return
     
-    # Backup the current database
-    backup_path = backup_database()
+    # Backup the current database in the background while the deletion is prepared
+    print("\nBacking up and deleting all data from the database...")
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        backup = executor.submit(backup_database)
+        deleted = delete_all_data(backup)
+    
+    if backup.exception() is not None:
+        print("Backup failed, no data was deleted.")
+        return
+    backup_path = backup.result()
     print(f"Backup created at: {backup_path}" if backup_path else "No backup created.")
     
-    # Delete all data
-    print("\nDeleting all data from the database...")
-    if delete_all_data():
+    if deleted:
         print("Data deletion complete.")
     else:
         print("Data deletion failed. Check errors above.")
@@ -142,10 +234,19 @@ def main():
     print("\nRe-initializing database...")
     init_database()
     
+    # Give the planner fresh statistics for the rebuilt schema instead of its
+    # defaults
+    try:
+        conn = open_db(project_root / "tahsilat_data.db")
+        conn.executescript("ANALYZE; PRAGMA optimize;")
+        conn.close()
+    except sqlite3.Error as e:
+        print(f"Warning: Could not refresh query planner statistics: {e}")
+    
     # Verify database was reset properly
     try:
         db_path = project_root / "tahsilat_data.db"
-        conn = sqlite3.connect(str(db_path))
+        conn = open_db(db_path)
         cursor = conn.cursor()
         
         # Check that payment_channels has the default values
@@ -156,10 +257,15 @@ def main():
         cursor.execute("SELECT COUNT(*) FROM payments;")
         payment_count = cursor.fetchone()[0]
         
+        # Check that new payments can still be written
+        insert_error = check_payment_insert(conn)
+        
         conn.close()
         
         print(f"\nVerification: Found {channel_count} payment channels and {payment_count} payments in the reset database.")
-        if channel_count >= 4 and payment_count == 0:
+        if insert_error is not None:
+            print(f"Error: New payments cannot be inserted after the reset: {insert_error}")
+        elif channel_count >= 4 and payment_count == 0:
             print("Database reset was successful!")
         else:
             print("Warning: Database may not have been reset properly. Please check the database.")
@@ -170,6 +276,7 @@ def main():
     if backup_path:
         print(f"A backup of your previous data was saved at: {backup_path}")
     print("\nYou can now start with a clean database.")
+    print("Run ANALYZE again after the first import batch (~5,000 payments) so the query planner sees real row counts.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
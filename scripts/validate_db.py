@@ -11,7 +11,7 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from api.utils.database import get_db_connection, get_db_path, execute_query
+from api.utils.database import get_db_connection, get_db_path, execute_query, execute_scalar
 
 def validate_database():
     """Validate that the database exists and has the expected tables."""
@@ -24,7 +24,7 @@ def validate_database():
     
     try:
         # Check tables
-        tables = execute_query("SELECT name FROM sqlite_master WHERE type='table'")
+        tables = execute_query("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
         table_names = [table["name"] for table in tables]
         
         expected_tables = ["customers", "properties", "payment_channels", "payments"]
@@ -36,8 +36,8 @@ def validate_database():
             return False
         
         # Check payment channels (should have default entries)
-        channels = execute_query("SELECT COUNT(*) as count FROM payment_channels")
-        if channels[0]["count"] == 0:
+        channel_count = execute_scalar("SELECT COUNT(*) FROM payment_channels")
+        if channel_count == 0:
             print("WARNING: No payment channels found in the database.")
             print("Default channels may not have been initialized.")
         
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.models.database import Base, Payment
+from api.utils.cache import clear_report_cache
+from api.utils.report_generator import generate_customer_report, generate_property_report
+
+
+class PagedReportTotalsTest(unittest.TestCase):
+    """Totals of the paged property/customer reports cover every payment exactly."""
+
+    AMOUNTS_TL = (1000.55, 1002.05, 1002.05)
+
+    def setUp(self):
+        handle, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.engine = create_engine(f"sqlite:///{self.db_path}")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        
+        for day, amount in enumerate(self.AMOUNTS_TL, start=1):
+            self.db.add(Payment(
+                payment_date=date(2024, 1, day),
+                customer_name="Ahmet Yilmaz",
+                property_id="P1",
+                property_name="Model Kuyu",
+                payment_channel="Bank Transfer",
+                amount_tl=amount,
+                amount_usd=amount / 30,
+                exchange_rate=30.0
+            ))
+        self.db.commit()
+        clear_report_cache()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+        os.remove(self.db_path)
+        clear_report_cache()
+
+    def test_property_report_totals_are_exact_across_pages(self):
+        report = generate_property_report(self.db, "P1", skip=1, limit=1)
+        
+        self.assertEqual(len(report["data"]), 1)
+        self.assertEqual(report["property_info"]["property_name"], "Model Kuyu")
+        self.assertEqual(report["summary"]["payment_count"], 3)
+        self.assertEqual(report["summary"]["total_tl"], 3004.65)
+
+    def test_customer_report_totals_are_exact_across_pages(self):
+        report = generate_customer_report(self.db, "Ahmet Yilmaz", skip=2, limit=1)
+        
+        self.assertEqual(len(report["data"]), 1)
+        self.assertEqual(report["summary"]["payment_count"], 3)
+        self.assertEqual(report["summary"]["total_tl"], 3004.65)
+
+
+if __name__ == "__main__":
+    unittest.main()